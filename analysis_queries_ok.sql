@@ -225,6 +225,22 @@ LEFT JOIN gebaeude g ON ST_Within(g.geom, q.geom)
 GROUP BY q.quartier_id, q.quartier_name, q.flaeche_ha
 ORDER BY geschossflachendichte;
 
+-- 7b. HEATMAP: Einwohner und Geschossfläche pro Hexagon-Zelle (250m)
+-- Voraussetzung: python gis_grid_aggregation.py (Zellen werden per Trigger nachgeführt)
+SELECT 
+    q,
+    r,
+    anzahl_anschluesse,
+    einwohner,
+    anzahl_gebaeude,
+    geschossflaeche_m2,
+    geom
+FROM raster_aggregate
+WHERE aufloesung_m = 250
+AND (anzahl_anschluesse > 0 OR anzahl_gebaeude > 0)
+AND geom && ST_MakeEnvelope(2681000, 1246000, 2685000, 1250000, 2056)
+ORDER BY einwohner DESC;
+
 -- ----------------------------------------------------------------------
 -- 8. CHANGE DETECTION: Was hat sich seit letztem Import geändert?
 -- ERROR:  relation "gebaeude_alt" does not exist
@@ -277,7 +293,7 @@ AND ST_Equals(n.geom, a.geom);
 
 -- ----------------------------------------------------------------------
 -- 9. PERFORMANCE-OPTIMIERUNG: Index-Analyse und Vacuum
--- ERROR:  VACUUM cannot run inside a transaction block
+-- OK (VACUUM läuft ausserhalb der Transaktion: python gis_maintenance.py)
 -- ----------------------------------------------------------------------
 SELECT 
     schemaname,
@@ -300,7 +316,8 @@ AND NOT EXISTS (
 ANALYZE werkleitungen;
 ANALYZE gebaeude;
 ANALYZE parzellen;
-VACUUM ANALYZE werkleitungen;
+-- VACUUM ANALYZE werkleitungen; -> nicht im Transaktionsblock möglich,
+-- wird von gis_maintenance.py in einer Autocommit-Session ausgeführt
 
 -- ----------------------------------------------------------------------
 -- 10. DATENEXPORT: Vorbereitung für INTERLIS-Export
@@ -312,7 +329,7 @@ SELECT
     l.leitung_id as objektnummer,
     l.material as leitungsmaterial,
     l.durchmesser as nennweite,
-    ST_Transform(l.geom, 2056) as geometrie,
+    l.geom as geometrie,  -- liegt bereits in LV95 (2056), kein ST_Transform nötig
     'in_betrieb' as betriebszustand,
     l.verlegedatum as erfassungsdatum,
     CURRENT_DATE as nachfuehrung,
@@ -563,6 +580,21 @@ SELECT
 FROM netzwerk
 ORDER BY netzebene, leitung_id;
 
+-- Sanierungsliste nach Versorgungskritikalität (alle Leitungen in einem Durchgang)
+-- Voraussetzung: python gis_network_criticality.py
+SELECT 
+    rang,
+    leitung_id,
+    material,
+    alter_jahre,
+    betroffene_haushalte,
+    betroffene_einwohner,
+    sanierungsprioritaet,
+    geschaetzte_sanierungskosten_chf
+FROM leitungen_kritikalitaet
+ORDER BY rang
+LIMIT 20;
+
 -- ----------------------------------------------------------------------
 -- SZENARIO 5: QUARTIER - Verdichtungsanalyse
 -- OK
@@ -720,6 +752,22 @@ SELECT
     ROUND(AVG(ST_Area(ST_Transform(geom, 3857)))::numeric, 2) as durchschnittsflaeche_m2
 FROM gebaeude;
 
+-- 12b. Dieselbe Auswertung mit gecachten Spalten (python gis_reprojection.py)
+-- geom_4326 / geom_3857 werden bei INSERT/UPDATE berechnet statt pro Abfrage
+SELECT 
+    'WGS84' as projektion,
+    COUNT(*) as anzahl,
+    ROUND(AVG(ST_Area(geom_4326))::numeric, 2) as durchschnittsflaeche_m2
+FROM gebaeude
+
+UNION ALL
+
+SELECT 
+    'Web Mercator' as projektion,
+    COUNT(*) as anzahl,
+    ROUND(AVG(ST_Area(geom_3857))::numeric, 2) as durchschnittsflaeche_m2
+FROM gebaeude;
+
 -- 13. TOPOLOGIE-PRÜFUNG: Überlappungen und Lücken
 -- OK
 SELECT 
@@ -750,18 +798,40 @@ FROM (
 WHERE ST_Area(gap.geom) > 1;
 
 -- 14. HISTORISCHE ANALYSE: Zeitliche Entwicklung
--- ERROR:  function pg_catalog.date_part(unknown, integer) does not exist
+-- OK (baujahr ist INTEGER - Jahrzehnt per Ganzzahldivision statt EXTRACT)
 SELECT 
-    EXTRACT(DECADE FROM baujahr) * 10 as jahrzehnt,
+    (baujahr / 10) * 10 as jahrzehnt,
     COUNT(*) as anzahl_gebaeude,
     ROUND(AVG(anzahl_geschosse)::numeric, 1) as durchschnitt_geschosse,
     ROUND(AVG(geschossflaeche_m2)::numeric, 0) as durchschnitt_geschossflaeche,
     ROUND(SUM(geschossflaeche_m2) / 1000) as total_geschossflaeche_1000m2
 FROM gebaeude
 WHERE baujahr BETWEEN 1900 AND 2023
-GROUP BY EXTRACT(DECADE FROM baujahr)
+GROUP BY baujahr / 10
 ORDER BY jahrzehnt;
 
+-- 14b. AS-OF: Leitungsnetz und Gebäudebestand zu einem Stichtag
+-- Voraussetzung: python gis_history.py (Historientabellen + Trigger)
+SELECT 
+    material,
+    COUNT(*) as anzahl_leitungen,
+    ROUND(SUM(ST_Length(geom))::numeric, 0) as gesamtlaenge_meter
+FROM werkleitungen_historie
+WHERE gueltigkeit @> TIMESTAMPTZ '2025-01-01'
+AND erfassung @> now()
+GROUP BY material
+ORDER BY gesamtlaenge_meter DESC;
+
+SELECT 
+    nutzung,
+    COUNT(*) as anzahl_gebaeude,
+    SUM(geschossflaeche_m2) as total_geschossflaeche
+FROM gebaeude_historie
+WHERE gueltigkeit @> TIMESTAMPTZ '2025-01-01'
+AND erfassung @> now()
+GROUP BY nutzung
+ORDER BY anzahl_gebaeude DESC;
+
 -- 15. RAUMORDNUNG: Nutzungszonen-Analyse
 -- OK
 SELECT 
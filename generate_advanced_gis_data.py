@@ -1,24 +1,62 @@
 import psycopg2
 from psycopg2 import sql
+from psycopg2.extras import execute_values
 import random
 from datetime import datetime, timedelta
+from decimal import Decimal
 import math
 import os
 
+from gis_checkpoint import LadeCheckpoint
+from gis_maintenance import GISMaintenance
+
 # ======================================================================
 # UMFASSENDER GIS DUMMY-DATEN GENERATOR
 # ======================================================================
 # Erstellt alle notwendigen Tabellen und füllt sie mit realistischen Testdaten
 
+# Spalten der Massendaten-Tabellen in der Reihenfolge der Zeilen-Tupel,
+# die Geometrie steht immer zuletzt (WKT)
+BULK_SPALTEN = {
+    'gebaeude': ['adresse', 'nutzung', 'baujahr', 'anzahl_geschosse',
+                 'geschossflaeche_m2', 'leerstandsquote', 'geom'],
+    'parzellen': ['parzellen_nr', 'eigentuemer', 'flaeche_m2', 'nutzungszone', 'geom'],
+    'hausanschluesse': ['adresse', 'einwohner', 'geom'],
+    'werkleitungen': ['leitung_id', 'material', 'durchmesser', 'verlegedatum', 'bemerkung',
+                      'import_datum', 'von_knoten', 'zu_knoten', 'status', 'geom'],
+}
+
+
+def insert_sql(table):
+    """INSERT und execute_values-Template für eine Massendaten-Tabelle"""
+    spalten = BULK_SPALTEN[table]
+    template = "(" + ", ".join(["%s"] * (len(spalten) - 1) + ["ST_GeomFromText(%s, 2056)"]) + ")"
+    return f"INSERT INTO {table} ({', '.join(spalten)}) VALUES %s", template
+
+
 class GISDummyDataGenerator:
-    def __init__(self, db_config):
+    # Tabellen die beim Import befüllt werden
+    TABELLEN = ['gemeindegrenzen', 'quartiere', 'gebaeude', 'hochwasserzonen',
+                'parzellen', 'bahnhoefe', 'hausanschluesse', 'werkleitungen']
+    
+    def __init__(self, db_config, grid_size=None, seed=0, batch_size=50):
         self.db_config = db_config
         self.conn = None
+        self.checkpoint = None
         
         # Zürich Koordinaten (LV95)
         self.zurich_x = 2683000
         self.zurich_y = 1248000
         self.radius = 3000  # 3km Radius
+        self.gemeinde_name = 'Zürich'
+        
+        # Koordinatenraster in Metern (z.B. 0.001 = Millimeter), None = volle Präzision
+        self.grid_size = grid_size
+        
+        # Jeder Batch zieht seine Zufallswerte aus (seed, Tabelle, Batch), ein
+        # fortgesetzter Import erzeugt also dieselben Daten wie ein ununterbrochener
+        self.seed = seed
+        self.batch_size = batch_size
     
     def connect(self):
         """Verbinde mit PostgreSQL"""
@@ -142,6 +180,84 @@ class GISDummyDataGenerator:
         self.conn.commit()
         print("✓ Alle Indizes erstellt")
     
+    def load_params(self):
+        """Parameter die den Inhalt des Imports bestimmen (Fingerprint)"""
+        return {
+            'zentrum': [self.zurich_x, self.zurich_y],
+            'radius': self.radius,
+            'gemeinde': self.gemeinde_name,
+            'grid_size': self.grid_size,
+            'seed': self.seed,
+            'batch_size': self.batch_size,
+        }
+    
+    def batches(self, table, num):
+        """
+        Batches einer Tabelle mit Checkpoint
+        
+        Liefert (batch, indizes) ab dem ersten nicht committeten Batch. Jeder
+        Batch wird zusammen mit seinem Fortschritt committet. Beginnt die
+        Tabelle von vorne (neu oder geänderte Parameter), werden ihre
+        bestehenden Zeilen zuerst gelöscht.
+        """
+        start = self.checkpoint.resume_batch(table, {**self.load_params(), 'anzahl': num})
+        
+        if start == 0:
+            self.restart_table(table, num)
+        else:
+            print(f"  Setze bei Batch {start} fort ({start * self.batch_size} Zeilen bereits geladen)")
+        
+        for batch in range(start, math.ceil(num / self.batch_size)):
+            self.seed_batch(table, batch)
+            yield batch, self.batch_range(batch, num)
+            
+            self.checkpoint.mark_batch(table, batch)
+            self.conn.commit()
+        
+        self.checkpoint.mark_done(table)
+        self.conn.commit()
+    
+    def restart_table(self, table, num):
+        """Bestehende Zeilen löschen und Checkpoint neu beginnen (ohne Commit)"""
+        cursor = self.conn.cursor()
+        cursor.execute(f"DELETE FROM {table}")
+        self.checkpoint.start(table, {**self.load_params(), 'anzahl': num})
+    
+    def seed_batch(self, table, batch):
+        """Zufallsgenerator für einen Batch initialisieren"""
+        random.seed(f"{self.seed}:{table}:{batch}")
+    
+    def batch_range(self, batch, num):
+        """Zeilen-Indizes eines Batches"""
+        return range(batch * self.batch_size, min(num, (batch + 1) * self.batch_size))
+    
+    def insert_rows(self, cursor, table, rows):
+        """Zeilen-Tupel einer Massendaten-Tabelle mit einem Statement einfügen"""
+        statement, template = insert_sql(table)
+        execute_values(cursor, statement, rows, template=template, page_size=len(rows))
+    
+    def is_loaded(self, table, num):
+        """Tabelle mit diesen Parametern bereits vollständig geladen?"""
+        if self.checkpoint.is_done(table, {**self.load_params(), 'anzahl': num}):
+            print(f"\n✓ {table} bereits geladen - übersprungen")
+            return True
+        return False
+    
+    def format_coord(self, value):
+        """Runde eine Koordinate auf das Speicherraster"""
+        if not self.grid_size:
+            return f"{value}"
+        
+        # Auf Raster einrasten und so viele Nachkommastellen ausgeben wie das
+        # Raster selbst hat (0.25 -> 2, 0.001 -> 3)
+        snapped = round(value / self.grid_size) * self.grid_size
+        decimals = max(0, -Decimal(str(self.grid_size)).as_tuple().exponent)
+        return f"{snapped:.{decimals}f}"
+    
+    def format_point(self, x, y):
+        """Koordinatenpaar für WKT"""
+        return f"{self.format_coord(x)} {self.format_coord(y)}"
+    
     def generate_polygon(self, center_x, center_y, radius, num_points=8):
         """Generiere ein Polygon um einen Mittelpunkt"""
         points = []
@@ -151,7 +267,7 @@ class GISDummyDataGenerator:
             r = radius * random.uniform(0.8, 1.2)
             x = center_x + r * math.cos(angle)
             y = center_y + r * math.sin(angle)
-            points.append(f"{x} {y}")
+            points.append(self.format_point(x, y))
         
         # Schließe das Polygon
         points.append(points[0])
@@ -159,27 +275,26 @@ class GISDummyDataGenerator:
     
     def populate_gemeindegrenzen(self):
         """Erstelle Gemeindegrenze (ganz Zürich)"""
+        if self.is_loaded('gemeindegrenzen', 1):
+            return
         print("\n=== Fülle Gemeindegrenzen ===")
         cursor = self.conn.cursor()
         
-        # Große Polygon um Zürich
-        gemeinde_polygon = self.generate_polygon(
-            self.zurich_x, self.zurich_y, 5000, 12
-        )
-        
-        cursor.execute(f"""
-            INSERT INTO gemeindegrenzen (name, geom)
-            VALUES ('Zürich', ST_GeomFromText('{gemeinde_polygon}', 2056))
-        """)
+        for batch, indizes in self.batches('gemeindegrenzen', 1):
+            # Große Polygon um Zürich
+            gemeinde_polygon = self.generate_polygon(
+                self.zurich_x, self.zurich_y, 5000, 12
+            )
+            
+            cursor.execute(f"""
+                INSERT INTO gemeindegrenzen (name, geom)
+                VALUES ('{self.gemeinde_name}', ST_GeomFromText('{gemeinde_polygon}', 2056))
+            """)
         
-        self.conn.commit()
         print(f"✓ 1 Gemeindegrenze erstellt")
     
     def populate_quartiere(self):
         """Erstelle Quartiere"""
-        print("\n=== Fülle Quartiere ===")
-        cursor = self.conn.cursor()
-        
         quartiere = [
             ('Altstadt', self.zurich_x, self.zurich_y),
             ('Industriequartier', self.zurich_x + 1000, self.zurich_y + 500),
@@ -187,28 +302,44 @@ class GISDummyDataGenerator:
             ('Seefeld', self.zurich_x + 1500, self.zurich_y),
             ('Wipkingen', self.zurich_x - 500, self.zurich_y + 1500),
         ]
+        if self.is_loaded('quartiere', len(quartiere)):
+            return
+        print("\n=== Fülle Quartiere ===")
+        cursor = self.conn.cursor()
         
-        for name, x, y in quartiere:
-            polygon = self.generate_polygon(x, y, 800, 6)
-            flaeche = random.randint(50, 200)
-            
-            cursor.execute(f"""
-                INSERT INTO quartiere (quartier_name, flaeche_ha, geom)
-                VALUES ('{name}', {flaeche}, ST_GeomFromText('{polygon}', 2056))
-            """)
+        for batch, indizes in self.batches('quartiere', len(quartiere)):
+            for i in indizes:
+                name, x, y = quartiere[i]
+                polygon = self.generate_polygon(x, y, 800, 6)
+                flaeche = random.randint(50, 200)
+                
+                cursor.execute(f"""
+                    INSERT INTO quartiere (quartier_name, flaeche_ha, geom)
+                    VALUES ('{name}', {flaeche}, ST_GeomFromText('{polygon}', 2056))
+                """)
         
-        self.conn.commit()
         print(f"✓ {len(quartiere)} Quartiere erstellt")
     
     def populate_gebaeude(self, num=200):
         """Erstelle Gebäude"""
+        if self.is_loaded('gebaeude', num):
+            return
         print(f"\n=== Fülle Gebäude ({num}) ===")
         cursor = self.conn.cursor()
         
+        for batch, indizes in self.batches('gebaeude', num):
+            self.insert_rows(cursor, 'gebaeude', self.gebaeude_rows(indizes))
+            print(f"  {indizes.stop} Gebäude erstellt...")
+        
+        print(f"✓ {num} Gebäude erstellt")
+    
+    def gebaeude_rows(self, indizes):
+        """Zeilen-Tupel für Gebäude (Reihenfolge wie BULK_SPALTEN)"""
         nutzungen = ['Wohnen', 'Gewerbe', 'Schule', 'Krankenhaus', 'Büro', 'Industrie']
         strassen = ['Hauptstrasse', 'Bahnhofstrasse', 'Seestrasse', 'Bergstrasse', 'Dorfstrasse']
         
-        for i in range(num):
+        rows = []
+        for i in indizes:
             x = self.zurich_x + random.randint(-self.radius, self.radius)
             y = self.zurich_y + random.randint(-self.radius, self.radius)
             
@@ -222,52 +353,53 @@ class GISDummyDataGenerator:
             geschossflaeche = random.randint(200, 5000)
             leerstand = random.uniform(0, 15)
             
-            cursor.execute(f"""
-                INSERT INTO gebaeude 
-                (adresse, nutzung, baujahr, anzahl_geschosse, geschossflaeche_m2, 
-                 leerstandsquote, geom)
-                VALUES ('{adresse}', '{nutzung}', {baujahr}, {geschosse}, 
-                        {geschossflaeche}, {leerstand}, 
-                        ST_GeomFromText('{polygon}', 2056))
-            """)
-            
-            if (i + 1) % 50 == 0:
-                print(f"  {i + 1} Gebäude erstellt...")
-        
-        self.conn.commit()
-        print(f"✓ {num} Gebäude erstellt")
+            rows.append((adresse, nutzung, baujahr, geschosse, geschossflaeche,
+                         leerstand, polygon))
+        return rows
     
     def populate_hochwasserzonen(self):
         """Erstelle Hochwasserzonen"""
-        print("\n=== Fülle Hochwasserzonen ===")
-        cursor = self.conn.cursor()
-        
         # Simuliere Fluss mit Hochwasserzonen
         zonen = [
             ('hoch', 30, self.zurich_x, self.zurich_y - 500, 300),
             ('mittel', 100, self.zurich_x, self.zurich_y - 500, 500),
             ('niedrig', 300, self.zurich_x, self.zurich_y - 500, 700),
         ]
+        if self.is_loaded('hochwasserzonen', len(zonen)):
+            return
+        print("\n=== Fülle Hochwasserzonen ===")
+        cursor = self.conn.cursor()
         
-        for gefahrenstufe, periode, x, y, radius in zonen:
-            polygon = self.generate_polygon(x, y, radius, 8)
-            
-            cursor.execute(f"""
-                INSERT INTO hochwasserzonen (gefahrenstufe, wiederkehrperiode_jahre, geom)
-                VALUES ('{gefahrenstufe}', {periode}, ST_GeomFromText('{polygon}', 2056))
-            """)
+        for batch, indizes in self.batches('hochwasserzonen', len(zonen)):
+            for i in indizes:
+                gefahrenstufe, periode, x, y, radius = zonen[i]
+                polygon = self.generate_polygon(x, y, radius, 8)
+                
+                cursor.execute(f"""
+                    INSERT INTO hochwasserzonen (gefahrenstufe, wiederkehrperiode_jahre, geom)
+                    VALUES ('{gefahrenstufe}', {periode}, ST_GeomFromText('{polygon}', 2056))
+                """)
         
-        self.conn.commit()
         print(f"✓ {len(zonen)} Hochwasserzonen erstellt")
     
     def populate_parzellen(self, num=100):
         """Erstelle Parzellen"""
+        if self.is_loaded('parzellen', num):
+            return
         print(f"\n=== Fülle Parzellen ({num}) ===")
         cursor = self.conn.cursor()
         
+        for batch, indizes in self.batches('parzellen', num):
+            self.insert_rows(cursor, 'parzellen', self.parzellen_rows(indizes))
+        
+        print(f"✓ {num} Parzellen erstellt")
+    
+    def parzellen_rows(self, indizes):
+        """Zeilen-Tupel für Parzellen (Reihenfolge wie BULK_SPALTEN)"""
         zonen = ['Wohnzone', 'Gewerbezone', 'Industriezone', 'Mischzone', 'Landwirtschaftszone']
         
-        for i in range(num):
+        rows = []
+        for i in indizes:
             x = self.zurich_x + random.randint(-self.radius, self.radius)
             y = self.zurich_y + random.randint(-self.radius, self.radius)
             
@@ -277,20 +409,11 @@ class GISDummyDataGenerator:
             flaeche = random.randint(400, 3000)
             nutzungszone = random.choice(zonen)
             
-            cursor.execute(f"""
-                INSERT INTO parzellen (parzellen_nr, eigentuemer, flaeche_m2, nutzungszone, geom)
-                VALUES ('{parzellen_nr}', '{eigentuemer}', {flaeche}, '{nutzungszone}',
-                        ST_GeomFromText('{polygon}', 2056))
-            """)
-        
-        self.conn.commit()
-        print(f"✓ {num} Parzellen erstellt")
+            rows.append((parzellen_nr, eigentuemer, flaeche, nutzungszone, polygon))
+        return rows
     
     def populate_bahnhoefe(self):
         """Erstelle Bahnhöfe"""
-        print("\n=== Fülle Bahnhöfe ===")
-        cursor = self.conn.cursor()
-        
         bahnhoefe = [
             ('Zürich HB', self.zurich_x, self.zurich_y),
             ('Zürich Stadelhofen', self.zurich_x + 1200, self.zurich_y + 300),
@@ -298,45 +421,79 @@ class GISDummyDataGenerator:
             ('Zürich Oerlikon', self.zurich_x - 400, self.zurich_y + 2000),
             ('Zürich Altstetten', self.zurich_x - 2500, self.zurich_y + 500),
         ]
+        if self.is_loaded('bahnhoefe', len(bahnhoefe)):
+            return
+        print("\n=== Fülle Bahnhöfe ===")
+        cursor = self.conn.cursor()
         
-        for name, x, y in bahnhoefe:
-            cursor.execute(f"""
-                INSERT INTO bahnhoefe (name, geom)
-                VALUES ('{name}', ST_GeomFromText('POINT({x} {y})', 2056))
-            """)
+        for batch, indizes in self.batches('bahnhoefe', len(bahnhoefe)):
+            for i in indizes:
+                name, x, y = bahnhoefe[i]
+                cursor.execute(f"""
+                    INSERT INTO bahnhoefe (name, geom)
+                    VALUES ('{name}', ST_GeomFromText('POINT({x} {y})', 2056))
+                """)
         
-        self.conn.commit()
         print(f"✓ {len(bahnhoefe)} Bahnhöfe erstellt")
     
     def populate_hausanschluesse(self, num=150):
         """Erstelle Hausanschlüsse"""
+        if self.is_loaded('hausanschluesse', num):
+            return
         print(f"\n=== Fülle Hausanschlüsse ({num}) ===")
         cursor = self.conn.cursor()
         
-        for i in range(num):
+        for batch, indizes in self.batches('hausanschluesse', num):
+            self.insert_rows(cursor, 'hausanschluesse', self.hausanschluesse_rows(indizes))
+        
+        print(f"✓ {num} Hausanschlüsse erstellt")
+    
+    def hausanschluesse_rows(self, indizes):
+        """Zeilen-Tupel für Hausanschlüsse (Reihenfolge wie BULK_SPALTEN)"""
+        rows = []
+        for i in indizes:
             x = self.zurich_x + random.randint(-self.radius, self.radius)
             y = self.zurich_y + random.randint(-self.radius, self.radius)
             
             adresse = f"Musterstrasse {i+1}"
             einwohner = random.randint(1, 6)
             
-            cursor.execute(f"""
-                INSERT INTO hausanschluesse (adresse, einwohner, geom)
-                VALUES ('{adresse}', {einwohner}, 
-                        ST_GeomFromText('POINT({x} {y})', 2056))
-            """)
-        
-        self.conn.commit()
-        print(f"✓ {num} Hausanschlüsse erstellt")
+            rows.append((adresse, einwohner, f"POINT({x} {y})"))
+        return rows
     
     def populate_werkleitungen_network(self, num=80):
         """Erstelle Werkleitungen mit Netzwerk-Struktur"""
+        if self.is_loaded('werkleitungen', num):
+            return
         print(f"\n=== Fülle Werkleitungen mit Knoten ({num}) ===")
         cursor = self.conn.cursor()
         
-        # Lösche alte Testdaten
-        cursor.execute("DELETE FROM werkleitungen")
+        # Beim ersten Batch werden alte Testdaten gelöscht
+        for batch, indizes in self.batches('werkleitungen', num):
+            self.insert_rows(cursor, 'werkleitungen', self.werkleitungen_rows(indizes))
         
+        print(f"✓ {num} Werkleitungen mit Knoten erstellt")
+    
+    def prepare_tables(self, neu_laden=False):
+        """Tabellen anlegen, ausser ein Import mit gleichen Parametern kann fortgesetzt werden"""
+        self.checkpoint = LadeCheckpoint(self.conn, 'gis_dummy')
+        params = self.load_params()
+        
+        if not neu_laden and self.checkpoint.is_done('tabellen', params):
+            print("\n✓ Tabellen bestehen - setze Import fort")
+            return
+        
+        self.create_tables()
+        
+        # Erst nach create_tables: ein Shard-Schema wird dort neu angelegt
+        self.checkpoint.install()
+        self.checkpoint.reset()
+        self.checkpoint.start('tabellen', params)
+        self.checkpoint.mark_done('tabellen')
+        self.conn.commit()
+    
+    def werkleitungen_rows(self, indizes):
+        """Zeilen-Tupel für Werkleitungen (Reihenfolge wie BULK_SPALTEN)"""
         materials = ['PE', 'PVC', 'Grauguss', 'Stahl']
         durchmesser = [100, 150, 200, 250, 300]
         
@@ -344,9 +501,8 @@ class GISDummyDataGenerator:
         hv_x = self.zurich_x
         hv_y = self.zurich_y
         
-        knoten_counter = 1
-        
-        for i in range(num):
+        rows = []
+        for i in indizes:
             # Erstelle Leitungssegment
             x_start = hv_x + random.randint(-2000, 2000)
             y_start = hv_y + random.randint(-2000, 2000)
@@ -356,38 +512,31 @@ class GISDummyDataGenerator:
             x_end = x_start + length * math.cos(math.radians(angle))
             y_end = y_start + length * math.sin(math.radians(angle))
             
+            # Kette HV_001 -> K_0002 -> K_0003 -> ...
             leitung_id = f"L_{i+1:05d}"
-            von_knoten = f"K_{knoten_counter:04d}" if i > 0 else "HV_001"
-            zu_knoten = f"K_{knoten_counter+1:04d}"
-            knoten_counter += 1
+            von_knoten = f"K_{i+1:04d}" if i > 0 else "HV_001"
+            zu_knoten = f"K_{i+2:04d}"
             
             material = random.choice(materials)
             dm = random.choice(durchmesser)
-            verlegedatum = datetime.now() - timedelta(days=random.randint(0, 25000))
+            jetzt = datetime.now()
+            verlegedatum = jetzt - timedelta(days=random.randint(0, 25000))
+            linestring = (f"LINESTRING({self.format_point(x_start, y_start)}, "
+                          f"{self.format_point(x_end, y_end)})")
             
-            cursor.execute(f"""
-                INSERT INTO werkleitungen 
-                (leitung_id, material, durchmesser, verlegedatum, bemerkung, 
-                 geom, import_datum, von_knoten, zu_knoten, status)
-                VALUES 
-                ('{leitung_id}', '{material}', {dm}, '{verlegedatum.date()}', 
-                 'Netzwerk-Test', 
-                 ST_GeomFromText('LINESTRING({x_start} {y_start}, {x_end} {y_end})', 2056),
-                 NOW(), '{von_knoten}', '{zu_knoten}', 'aktiv')
-            """)
-        
-        self.conn.commit()
-        print(f"✓ {num} Werkleitungen mit Knoten erstellt")
+            rows.append((leitung_id, material, dm, verlegedatum.date(), 'Netzwerk-Test',
+                         jetzt, von_knoten, zu_knoten, 'aktiv', linestring))
+        return rows
     
-    def run(self):
-        """Führe komplette Datengenerierung durch"""
+    def run(self, neu_laden=False):
+        """Führe komplette Datengenerierung durch (setzt abgebrochene Importe fort)"""
         print("="*60)
         print("GIS DUMMY-DATEN GENERATOR")
         print("="*60)
         
         try:
             self.connect()
-            self.create_tables()
+            self.prepare_tables(neu_laden)
             self.populate_gemeindegrenzen()
             self.populate_quartiere()
             self.populate_gebaeude(200)
@@ -397,6 +546,9 @@ class GISDummyDataGenerator:
             self.populate_hausanschluesse(150)
             self.populate_werkleitungen_network(80)
             
+            # Statistiken nach dem Import auffrischen
+            GISMaintenance(self.db_config).run_after_load(self.TABELLEN)
+            
             print("\n" + "="*60)
             print("✓ ALLE DUMMY-DATEN ERFOLGREICH ERSTELLT!")
             print("="*60)
@@ -405,7 +557,10 @@ class GISDummyDataGenerator:
             
         except Exception as e:
             print(f"\n❌ FEHLER: {e}")
-            self.conn.rollback()
+            print("   Committete Batches bleiben erhalten, ein erneuter Aufruf setzt fort.")
+            if self.conn:
+                self.conn.rollback()
+            raise
         finally:
             if self.conn:
                 self.conn.close()
@@ -420,5 +575,14 @@ if __name__ == "__main__":
         'password': os.getenv('DB_PASSWORD', input('Passwort: '))
     }
     
-    generator = GISDummyDataGenerator(db_config)
-    generator.run()
+    # Optionales Speicherraster, z.B. GIS_GRID_SIZE=0.001 für Millimeter
+    grid_size = os.getenv('GIS_GRID_SIZE')
+    
+    generator = GISDummyDataGenerator(
+        db_config,
+        grid_size=float(grid_size) if grid_size else None,
+        seed=int(os.getenv('GIS_SEED', 0)),
+        batch_size=int(os.getenv('GIS_BATCH_GROESSE', 50)),
+    )
+    # GIS_NEU_LADEN=1 verwirft einen unterbrochenen Import und beginnt von vorne
+    generator.run(neu_laden=os.getenv('GIS_NEU_LADEN') == '1')
@@ -1,15 +1,58 @@
 import psycopg2
 import os
 
+from gis_checkpoint import LadeCheckpoint
+from gis_maintenance import GISMaintenance
+
 # ======================================================================
 # REALISTISCHE GIS DUMMY-DATEN - SZENARIO-BASIERT
 # ======================================================================
 # Erstellt kleine, logisch zusammenhängende Szenarien statt zufälliger Daten
 
+# Zeilen jedes Szenarios als (tabelle, bedingung, anzahl): erkennbar an
+# Adressen/IDs bzw. an der Lage relativ zu den Basiskoordinaten, mit denen das
+# Szenario geladen wurde, und die erwartete Anzahl Zeilen
+SZENARIO_ZEILEN = {
+    'szenario_1': [
+        ('gebaeude', "adresse LIKE 'Mühlengasse %%'", 8),
+        ('hausanschluesse', "adresse LIKE 'Mühlengasse %%'", 8),
+        ('werkleitungen', "left(leitung_id, 5) = 'L_MG_'", 9),
+    ],
+    'szenario_2': [
+        ('gebaeude', "adresse IN ('Am Fluss 1', 'Uferweg 23', 'Spitalstrasse 1')", 3),
+        ('hochwasserzonen',
+         """geom @ ST_MakeEnvelope(%(base_x)s + 450, %(base_y)s,
+                                   %(base_x)s + 550, %(base_y)s + 400, 2056)""", 2),
+    ],
+    'szenario_3': [
+        ('bahnhoefe', "name = 'Winterthur Grüze'", 1),
+        ('parzellen', "parzellen_nr LIKE 'P-GRUEZE-%%'", 3),
+    ],
+    'szenario_4': [
+        ('werkleitungen',
+         """leitung_id IN ('L_TRANSPORT_01', 'L_VERTEIL_NORD', 'L_VERTEIL_OST',
+                           'L_STICH_N_01', 'L_STICH_N_02', 'L_STICH_N_03',
+                           'L_ALT_GRAUGUSS')""", 7),
+    ],
+    'szenario_5': [
+        ('quartiere', "quartier_name = 'Neuwiesen'", 1),
+        ('gebaeude', "adresse LIKE 'Neuwiesenstrasse %%' OR adresse LIKE 'Neuwiesenpark %%'", 6),
+    ],
+}
+
+
 class RealisticGISDummyData:
+    # Tabellen die von den Szenarien befüllt werden
+    TABELLEN = ['gebaeude', 'hausanschluesse', 'werkleitungen', 'hochwasserzonen',
+                'bahnhoefe', 'parzellen', 'quartiere']
+    
+    # Bei inhaltlichen Änderungen an den Szenarien erhöhen -> werden neu geladen
+    SZENARIEN_VERSION = 1
+    
     def __init__(self, db_config):
         self.db_config = db_config
         self.conn = None
+        self.checkpoint = None
         
         # Winterthur Koordinaten (LV95) - passend zur Stellenausschreibung!
         self.base_x = 2697000
@@ -21,6 +64,65 @@ class RealisticGISDummyData:
         self.conn.autocommit = False
         print("✓ Datenbankverbindung hergestellt")
     
+    def scenario_params(self):
+        """Parameter die den Inhalt der Szenarien bestimmen (Fingerprint)"""
+        return {
+            'version': self.SZENARIEN_VERSION,
+            'base_x': self.base_x,
+            'base_y': self.base_y,
+        }
+    
+    def delete_scenario(self, schritt, params):
+        """Zeilen eines Szenarios löschen (ohne Commit)"""
+        cursor = self.conn.cursor()
+        geloescht = 0
+        for table, bedingung, _ in SZENARIO_ZEILEN[schritt]:
+            cursor.execute(f"DELETE FROM {table} WHERE {bedingung}", params)
+            geloescht += cursor.rowcount
+        return geloescht
+    
+    def scenario_complete(self, schritt, params):
+        """Alle Zeilen eines Szenarios noch genau einmal vorhanden?"""
+        cursor = self.conn.cursor()
+        for table, bedingung, anzahl in SZENARIO_ZEILEN[schritt]:
+            cursor.execute(f"SELECT COUNT(*) FROM {table} WHERE {bedingung}", params)
+            if cursor.fetchone()[0] != anzahl:
+                return False
+        return True
+    
+    def load_scenario(self, schritt, erstellen):
+        """
+        Szenario idempotent laden
+        
+        Mit unveränderten Parametern bereits geladene Szenarien werden
+        übersprungen, sofern ihre Zeilen noch vollständig vorhanden sind (der
+        Generator für Massendaten leert bzw. ersetzt dieselben Tabellen).
+        Alle anderen werden ersetzt: bestehende Zeilen (auch aus alten Läufen
+        ohne Checkpoint) werden gelöscht und das Szenario neu erstellt.
+        """
+        params = self.scenario_params()
+        if self.checkpoint.is_done(schritt, params):
+            if self.scenario_complete(schritt, params):
+                print(f"\n✓ {schritt} bereits geladen - übersprungen")
+                return
+            print(f"\n  {schritt} als geladen markiert, aber Zeilen fehlen - lade neu")
+        
+        status = self.checkpoint.status(schritt)
+        alt = status['parameter'] if status else params
+        geloescht = sum(
+            self.delete_scenario(schritt, p)
+            for p in ([params] if alt == params else [alt, params])
+        )
+        if geloescht:
+            print(f"\n  {geloescht} bestehende Zeilen von {schritt} werden ersetzt")
+        
+        # Das Szenario committet Löschen, Fortschritt und Daten gemeinsam. Ein
+        # Abbruch vor mark_done lässt es offen -> wird beim nächsten Lauf ersetzt
+        self.checkpoint.start(schritt, params)
+        erstellen()
+        self.checkpoint.mark_done(schritt)
+        self.conn.commit()
+    
     def create_scenario_1_wohnstrasse(self):
         """
         SZENARIO 1: Wohnstraße mit realistischer Infrastruktur
@@ -444,11 +546,17 @@ class RealisticGISDummyData:
         
         try:
             self.connect()
-            self.create_scenario_1_wohnstrasse()
-            self.create_scenario_2_hochwasser()
-            self.create_scenario_3_bahnhof_entwicklung()
-            self.create_scenario_4_leitungsnetz()
-            self.create_scenario_5_quartier()
+            self.checkpoint = LadeCheckpoint(self.conn, 'szenarien')
+            self.checkpoint.install()
+            
+            self.load_scenario('szenario_1', self.create_scenario_1_wohnstrasse)
+            self.load_scenario('szenario_2', self.create_scenario_2_hochwasser)
+            self.load_scenario('szenario_3', self.create_scenario_3_bahnhof_entwicklung)
+            self.load_scenario('szenario_4', self.create_scenario_4_leitungsnetz)
+            self.load_scenario('szenario_5', self.create_scenario_5_quartier)
+            
+            # Statistiken nach dem Import auffrischen
+            GISMaintenance(self.db_config).run_after_load(self.TABELLEN)
             
             print("\n" + "="*70)
             print("✓ ALLE SZENARIEN ERFOLGREICH ERSTELLT!")
@@ -463,8 +571,10 @@ class RealisticGISDummyData:
             
         except Exception as e:
             print(f"\n❌ FEHLER: {e}")
+            print("   Abgeschlossene Szenarien bleiben erhalten, ein erneuter Aufruf setzt fort.")
             if self.conn:
                 self.conn.rollback()
+            raise
         finally:
             if self.conn:
                 self.conn.close()
@@ -0,0 +1,314 @@
+# ======================================================================
+# ANALYSE-KATALOG FÜR PYTHON-WERKZEUGE
+# ======================================================================
+# Ausgewählte Abfragen aus analysis_queries_ok.sql als Python-Katalog, damit
+# Werkzeuge (Scatter-Gather, Cache, Lasttest) sie per ID ausführen können.
+#
+# Pro Analyse:
+# - titel:     Bezug zur SQL-Sammlung
+# - tabellen:  Tabellen von denen das Ergebnis abhängt
+# - sql:       Abfrage (ohne Semikolon), Parameter als %(name)s, Literal-% als %%
+# - parameter: Standardwerte der Parameter
+# - version_groesse: optional True, wenn das Ergebnis von der physischen
+#              Grösse abhängt (ändert sich auch durch Autovacuum, ohne Daten-
+#              oder Strukturänderung) - der Cache nimmt sie in die Version auf
+# - shard_sql: optional, Variante von sql für die Shards mit Hilfsspalten
+#              (Summen, Anzahlen, Schlüssellisten) für exakte Re-Aggregation
+# - merge:     Zusammenführung über mehrere Gemeinden (Shards)
+#     sortierung:  [(spalte, absteigend)] - ORDER BY nach dem Zusammenführen
+#     limit:       LIMIT nach dem Zusammenführen
+#     gruppierung: GROUP BY-Spalten für die Re-Aggregation
+#     aggregate:   {spalte: funktion}, Ergebnis hat nur Gruppierungs-, Aggregat-
+#                  und Anteilsspalten (Hilfsspalten fallen weg)
+#                  'sum' | 'count' | 'min' | 'max'
+#                  ('quotient', zaehler, nenner, stellen) - ROUND(SUM(zaehler) /
+#                      SUM(nenner), stellen), nenner ist Spalte oder Zahl (AVG,
+#                      Einheiten umrechnen)
+#                  ('distinct', schluesselspalte) - Anzahl verschiedener Werte
+#                      über alle Shards (Spalte liefert array_agg(DISTINCT ...))
+#     anteil:      {spalte: basisspalte} - Prozentanteil am Gesamttotal neu berechnen
+
+ANALYSEN = {
+    'hochwasser_gebaeude': {
+        'titel': '1. Räumliche Analyse: Gebäude in Hochwassergebieten',
+        'tabellen': ['gebaeude', 'hochwasserzonen'],
+        'sql': """
+            SELECT
+                g.gebaeude_id,
+                g.adresse,
+                g.nutzung,
+                h.gefahrenstufe,
+                h.wiederkehrperiode_jahre,
+                ROUND(
+                    (ST_Area(ST_Intersection(g.geom, h.geom)) / ST_Area(g.geom) * 100)::numeric,
+                    2
+                ) as betroffener_anteil_prozent
+            FROM gebaeude g
+            JOIN hochwasserzonen h ON ST_Intersects(g.geom, h.geom)
+            WHERE h.gefahrenstufe IN ('hoch', 'mittel')
+            AND g.nutzung IN ('Wohnen', 'Schule', 'Krankenhaus')
+            ORDER BY betroffener_anteil_prozent DESC
+        """,
+        'parameter': {},
+        'merge': {
+            'sortierung': [('betroffener_anteil_prozent', True)],
+        },
+    },
+
+    'quartier_verdichtung': {
+        'titel': '7. Aggregation: Verdichtungsanalyse nach Quartieren',
+        'tabellen': ['quartiere', 'gebaeude'],
+        'sql': """
+            SELECT
+                q.quartier_name,
+                q.flaeche_ha,
+                COUNT(DISTINCT g.gebaeude_id) as anzahl_gebaeude,
+                SUM(g.geschossflaeche_m2) as total_geschossflaeche,
+                SUM(g.geschossflaeche_m2) / (q.flaeche_ha * 10000) as geschossflachendichte,
+                AVG(g.anzahl_geschosse) as durchschnittliche_geschosse,
+                COUNT(CASE WHEN g.baujahr < 1950 THEN 1 END) as altbauten,
+                COUNT(CASE WHEN g.leerstandsquote > 5 THEN 1 END) as gebaeude_mit_leerstand
+            FROM quartiere q
+            LEFT JOIN gebaeude g ON ST_Within(g.geom, q.geom)
+            GROUP BY q.quartier_id, q.quartier_name, q.flaeche_ha
+            ORDER BY geschossflachendichte
+        """,
+        'parameter': {},
+        'merge': {
+            'sortierung': [('geschossflachendichte', False)],
+        },
+    },
+
+    'hochwasser_risiko': {
+        'titel': 'Szenario 2: Hochwasser - Priorisierung Schutzmassnahmen',
+        'tabellen': ['gebaeude', 'hochwasserzonen'],
+        'sql': """
+            SELECT
+                g.adresse,
+                g.nutzung,
+                h.gefahrenstufe,
+                CASE
+                    WHEN g.nutzung = 'Schule' THEN 100
+                    WHEN g.nutzung = 'Krankenhaus' THEN 95
+                    WHEN g.nutzung = 'Wohnen' THEN 80
+                    ELSE 50
+                END +
+                CASE h.gefahrenstufe
+                    WHEN 'hoch' THEN 50
+                    WHEN 'mittel' THEN 25
+                    ELSE 10
+                END as prioritaet_score
+            FROM gebaeude g
+            JOIN hochwasserzonen h ON ST_Intersects(g.geom, h.geom)
+            ORDER BY prioritaet_score DESC
+        """,
+        'parameter': {},
+        'merge': {
+            'sortierung': [('prioritaet_score', True)],
+        },
+    },
+
+    'bahnhof_entwicklung': {
+        'titel': 'Szenario 3: Bahnhof - Verdichtungspotenzial der Parzellen',
+        'tabellen': ['parzellen', 'bahnhoefe'],
+        'sql': """
+            SELECT
+                p.parzellen_nr,
+                p.nutzungszone,
+                p.flaeche_m2,
+                b.name as bahnhof,
+                ROUND(ST_Distance(p.geom, b.geom)::numeric, 0) as distanz_meter
+            FROM parzellen p
+            CROSS JOIN LATERAL (
+                SELECT name, geom
+                FROM bahnhoefe
+                ORDER BY geom <-> p.geom
+                LIMIT 1
+            ) b
+            WHERE ST_DWithin(p.geom, b.geom, %(radius)s)
+            ORDER BY distanz_meter
+        """,
+        'parameter': {'radius': 800},
+        'merge': {
+            'sortierung': [('distanz_meter', False)],
+        },
+    },
+
+    'netz_versorgung': {
+        'titel': 'Szenario 4: Werkleitungsnetz - Versorgungspfade ab Hauptverteiler',
+        'tabellen': ['werkleitungen'],
+        'sql': """
+            WITH RECURSIVE netzwerk AS (
+                SELECT
+                    leitung_id,
+                    zu_knoten,
+                    durchmesser,
+                    1 as netzebene,
+                    leitung_id::text as pfad
+                FROM werkleitungen
+                WHERE von_knoten IN ('HV_STADTMITTE', 'RESERVOIR_LINDBERG', 'HV_001')
+
+                UNION ALL
+
+                SELECT
+                    w.leitung_id,
+                    w.zu_knoten,
+                    w.durchmesser,
+                    n.netzebene + 1,
+                    n.pfad || ' -> ' || w.leitung_id
+                FROM werkleitungen w
+                INNER JOIN netzwerk n ON w.von_knoten = n.zu_knoten
+                WHERE n.netzebene < 10
+            )
+            SELECT netzebene, leitung_id, durchmesser, pfad as versorgungspfad
+            FROM netzwerk
+            ORDER BY netzebene, leitung_id
+        """,
+        'parameter': {},
+        'merge': {
+            'sortierung': [('netzebene', False), ('leitung_id', False)],
+        },
+    },
+
+    'nutzungszonen': {
+        'titel': '15. Raumordnung: Nutzungszonen-Analyse',
+        'tabellen': ['parzellen'],
+        'sql': """
+            SELECT
+                nutzungszone,
+                COUNT(*) as anzahl_parzellen,
+                ROUND(SUM(flaeche_m2) / 10000, 2) as total_flaeche_ha,
+                ROUND(AVG(flaeche_m2)::numeric, 0) as durchschnittsflaeche_m2,
+                COUNT(DISTINCT eigentuemer) as anzahl_eigentuemer,
+                ROUND(100.0 * COUNT(*) / SUM(COUNT(*)) OVER(), 1) as anteil_prozent
+            FROM parzellen
+            GROUP BY nutzungszone
+            ORDER BY total_flaeche_ha DESC
+        """,
+        'shard_sql': """
+            SELECT
+                nutzungszone,
+                COUNT(*) as anzahl_parzellen,
+                SUM(flaeche_m2) as summe_flaeche_m2,
+                COUNT(flaeche_m2) as anzahl_flaeche_m2,
+                array_agg(DISTINCT eigentuemer)
+                    FILTER (WHERE eigentuemer IS NOT NULL) as eigentuemer_liste
+            FROM parzellen
+            GROUP BY nutzungszone
+        """,
+        'parameter': {},
+        'merge': {
+            'gruppierung': ['nutzungszone'],
+            'aggregate': {
+                'anzahl_parzellen': 'sum',
+                'total_flaeche_ha': ('quotient', 'summe_flaeche_m2', 10000, 2),
+                'durchschnittsflaeche_m2': ('quotient', 'summe_flaeche_m2', 'anzahl_flaeche_m2', 0),
+                # Gleiche Eigentümer in mehreren Gemeinden zählen einmal
+                'anzahl_eigentuemer': ('distinct', 'eigentuemer_liste'),
+            },
+            'anteil': {'anteil_prozent': 'anzahl_parzellen'},
+            'sortierung': [('total_flaeche_ha', True)],
+        },
+    },
+
+    'gebaeude_volumen': {
+        'titel': '17. 3D-Analyse: Volumenberechnung für Gebäude (Top 10)',
+        'tabellen': ['gebaeude'],
+        'sql': """
+            SELECT
+                gebaeude_id,
+                adresse,
+                anzahl_geschosse,
+                geschossflaeche_m2,
+                ROUND((geschossflaeche_m2 * anzahl_geschosse * 3)::numeric, 0) as geschaetztes_volumen_m3
+            FROM gebaeude
+            WHERE anzahl_geschosse IS NOT NULL
+            ORDER BY geschaetztes_volumen_m3 DESC
+            LIMIT %(limit)s
+        """,
+        'parameter': {'limit': 10},
+        'merge': {
+            'sortierung': [('geschaetztes_volumen_m3', True)],
+            'limit': 'limit',
+        },
+    },
+
+    'systembericht': {
+        'titel': '18. Automatische Berichte: Zusammenfassung Gesamtsystem',
+        'tabellen': ['gebaeude', 'parzellen', 'werkleitungen', 'hausanschluesse'],
+        'sql': """
+            SELECT
+                (SELECT COUNT(*) FROM gebaeude) as total_gebaeude,
+                (SELECT COUNT(*) FROM parzellen) as total_parzellen,
+                (SELECT COUNT(*) FROM werkleitungen) as total_leitungen,
+                (SELECT ROUND(SUM(ST_Length(geom))::numeric, 0) FROM werkleitungen) as leitungslaenge_meter,
+                (SELECT COUNT(*) FROM hausanschluesse) as total_hausanschluesse,
+                (SELECT ROUND(AVG(einwohner)::numeric, 1) FROM hausanschluesse) as durchschnitt_einwohner_pro_haushalt,
+                (SELECT COUNT(*) FROM gebaeude WHERE baujahr < 1950) as gebaeude_vor_1950
+        """,
+        'shard_sql': """
+            SELECT
+                (SELECT COUNT(*) FROM gebaeude) as total_gebaeude,
+                (SELECT COUNT(*) FROM parzellen) as total_parzellen,
+                (SELECT COUNT(*) FROM werkleitungen) as total_leitungen,
+                (SELECT SUM(ST_Length(geom))::numeric FROM werkleitungen) as summe_leitungslaenge,
+                (SELECT COUNT(*) FROM hausanschluesse) as total_hausanschluesse,
+                (SELECT SUM(einwohner) FROM hausanschluesse) as summe_einwohner,
+                (SELECT COUNT(einwohner) FROM hausanschluesse) as anzahl_einwohner,
+                (SELECT COUNT(*) FROM gebaeude WHERE baujahr < 1950) as gebaeude_vor_1950
+        """,
+        'parameter': {},
+        'merge': {
+            'gruppierung': [],
+            'aggregate': {
+                'total_gebaeude': 'sum',
+                'total_parzellen': 'sum',
+                'total_leitungen': 'sum',
+                'leitungslaenge_meter': ('quotient', 'summe_leitungslaenge', 1, 0),
+                'total_hausanschluesse': 'sum',
+                'durchschnitt_einwohner_pro_haushalt': ('quotient', 'summe_einwohner', 'anzahl_einwohner', 1),
+                'gebaeude_vor_1950': 'sum',
+            },
+        },
+    },
+
+    'groessenbericht': {
+        'titel': '20. Performance-Monitoring: Query-Statistiken',
+        'tabellen': ['gebaeude', 'parzellen', 'werkleitungen', 'hausanschluesse'],
+        'sql': """
+            SELECT
+                schemaname,
+                tablename,
+                ROUND(pg_total_relation_size(schemaname||'.'||tablename) / 1048576.0, 2) as groesse_mb,
+                (SELECT COUNT(*) FROM pg_indexes
+                 WHERE schemaname = t.schemaname AND tablename = t.tablename) as anzahl_indizes,
+                (SELECT COUNT(*) FROM information_schema.columns
+                 WHERE table_schema = t.schemaname AND table_name = t.tablename) as anzahl_spalten
+            FROM pg_tables t
+            WHERE schemaname = current_schema()
+            AND tablename IN ('gebaeude', 'parzellen', 'werkleitungen', 'hausanschluesse')
+            ORDER BY groesse_mb DESC
+        """,
+        'parameter': {},
+        # Grössen ändern sich auch durch Autovacuum und Index-Wachstum
+        'version_groesse': True,
+        'merge': {
+            'sortierung': [('groesse_mb', True)],
+        },
+    },
+}
+
+
+def get_analyse(analyse_id):
+    """Hole eine Analyse aus dem Katalog"""
+    if analyse_id not in ANALYSEN:
+        raise KeyError(f"Unbekannte Analyse: {analyse_id} "
+                       f"(verfügbar: {', '.join(sorted(ANALYSEN))})")
+    return ANALYSEN[analyse_id]
+
+
+def resolve_parameter(analyse, params=None):
+    """Standardparameter einer Analyse mit übergebenen Werten kombinieren"""
+    resolved = dict(analyse.get('parameter', {}))
+    resolved.update(params or {})
+    return resolved
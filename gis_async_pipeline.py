@@ -0,0 +1,255 @@
+import psycopg2
+from psycopg2.extras import execute_values
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import math
+import os
+import time
+
+from generate_advanced_gis_data import GISDummyDataGenerator, insert_sql
+from gis_maintenance import GISMaintenance
+
+# ======================================================================
+# ASYNCIO-PIPELINE: ZEILEN ERZEUGEN UND SCHREIBEN ÜBERLAPPEN
+# ======================================================================
+# Beim sequentiellen Import wechseln sich CPU-Arbeit (Zufallsattribute,
+# WKT-Strings) und Warten auf die Datenbank ab. Hier erzeugt ein Producer
+# Batches (Attribute + Geometrie) in einem Hintergrund-Thread und legt sie in
+# eine begrenzte asyncio.Queue. Mehrere Writer mit eigener Verbindung holen
+# Batches ab und schreiben sie parallel. psycopg2 gibt während des Wartens
+# auf den Server den GIL frei, Erzeugen und Schreiben laufen also wirklich
+# gleichzeitig.
+#
+# Die volle Queue bremst den Producer (Backpressure): höchstens queue_size
+# Batches liegen gleichzeitig im Speicher, unabhängig von der Importgrösse.
+#
+# Die Zeilen kommen aus denselben Buildern und Seeds wie beim sequentiellen
+# Import, die Daten sind also identisch. Writer committen Batches in
+# beliebiger Reihenfolge, der Checkpoint einer Tabelle wird deshalb erst am
+# Ende gesetzt - ein abgebrochener Pipeline-Import lädt die Tabelle neu.
+#
+# Parallele Writer können sich über die Raster-Trigger gegenseitig sperren.
+# Deadlocks und Serialisierungsfehler betreffen nur den eigenen Batch: er wird
+# zurückgerollt und nach kurzer Pause erneut geschrieben.
+
+# Deadlock / Serialisierungsfehler -> Batch wiederholen
+RETRY_CODES = ('40P01', '40001')
+
+# Massendaten-Tabellen und Standardmengen (wie GISDummyDataGenerator.run)
+STANDARD_ANZAHL = {
+    'gebaeude': 200,
+    'parzellen': 100,
+    'hausanschluesse': 150,
+    'werkleitungen': 80,
+}
+
+
+class AsyncGenerationPipeline:
+    def __init__(self, generator, writers=4, queue_size=8, max_versuche=5):
+        self.generator = generator
+        self.writers = writers
+        self.queue_size = queue_size
+        self.max_versuche = max_versuche
+
+        # Builder nutzen das globale random -> genau ein Producer-Thread
+        self.producer_pool = ThreadPoolExecutor(max_workers=1)
+        self.writer_pool = ThreadPoolExecutor(max_workers=writers)
+
+        # Summierte Zeiten pro Stufe (Writer-Zeit über alle Writer), nur im
+        # Event-Loop aktualisiert - die Threads liefern ihre Werte zurück
+        self.zeit_erzeugen = 0.0
+        self.zeit_schreiben = 0.0
+        self.zeilen = 0
+        self.wiederholungen = 0
+
+    def connect_writer(self):
+        """Eigene Verbindung pro Writer"""
+        conn = psycopg2.connect(**self.generator.db_config)
+        conn.autocommit = False
+        return conn
+
+    def build_batch(self, table, batch, num):
+        """Zeilen eines Batches und Dauer erzeugen (läuft im Producer-Thread)"""
+        start = time.perf_counter()
+        self.generator.seed_batch(table, batch)
+        builder = getattr(self.generator, f"{table}_rows")
+        rows = builder(self.generator.batch_range(batch, num))
+        return rows, time.perf_counter() - start
+
+    def write_batch(self, conn, table, rows):
+        """
+        Batch einfügen und committen, bei Deadlock wiederholen (läuft im Writer-Thread)
+
+        Gibt (Dauer, Anzahl Wiederholungen) zurück - gezählt wird im Event-Loop.
+        """
+        start = time.perf_counter()
+        statement, template = insert_sql(table)
+        for versuch in range(1, self.max_versuche + 1):
+            try:
+                cursor = conn.cursor()
+                execute_values(cursor, statement, rows, template=template, page_size=len(rows))
+                conn.commit()
+                return time.perf_counter() - start, versuch - 1
+            except psycopg2.Error as e:
+                conn.rollback()
+                if e.pgcode not in RETRY_CODES or versuch == self.max_versuche:
+                    raise
+                time.sleep(0.05 * 2 ** versuch)
+
+    async def produce(self, anzahl, queue):
+        """Alle Batches aller Tabellen erzeugen, wartet bei voller Queue"""
+        loop = asyncio.get_running_loop()
+        for table, num in anzahl.items():
+            for batch in range(math.ceil(num / self.generator.batch_size)):
+                rows, dauer = await loop.run_in_executor(
+                    self.producer_pool, self.build_batch, table, batch, num
+                )
+                self.zeit_erzeugen += dauer
+                await queue.put((table, rows))
+
+        # Ein Endsignal pro Writer
+        for _ in range(self.writers):
+            await queue.put(None)
+
+    async def write(self, conn, queue):
+        """Batches aus der Queue schreiben bis zum Endsignal"""
+        loop = asyncio.get_running_loop()
+        while True:
+            item = await queue.get()
+            if item is None:
+                return
+
+            table, rows = item
+            future = loop.run_in_executor(
+                self.writer_pool, self.write_batch, conn, table, rows
+            )
+            try:
+                dauer, wiederholungen = await asyncio.shield(future)
+            except asyncio.CancelledError:
+                # Der Thread läuft trotz Abbruch weiter und nutzt die
+                # Verbindung - erst nach seinem Ende darf sie geschlossen werden
+                await asyncio.wait([future])
+                raise
+            self.zeit_schreiben += dauer
+            self.wiederholungen += wiederholungen
+            self.zeilen += len(rows)
+
+    async def pipeline(self, anzahl):
+        """Producer und Writer gemeinsam ausführen"""
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue(maxsize=self.queue_size)
+
+        verbindungen = await asyncio.gather(*(
+            loop.run_in_executor(self.writer_pool, self.connect_writer)
+            for _ in range(self.writers)
+        ), return_exceptions=True)
+        conns = [c for c in verbindungen if not isinstance(c, BaseException)]
+        fehler = [c for c in verbindungen if isinstance(c, BaseException)]
+        if fehler:
+            # Bereits geöffnete Verbindungen nicht offen lassen
+            for conn in conns:
+                conn.close()
+            raise fehler[0]
+
+        tasks = [asyncio.create_task(self.produce(anzahl, queue))]
+        tasks += [asyncio.create_task(self.write(conn, queue)) for conn in conns]
+        try:
+            await asyncio.gather(*tasks)
+        except BaseException:
+            # Ein Fehler beendet alle Stufen, sonst blockiert der Producer an der Queue
+            for task in tasks:
+                task.cancel()
+            # Warten bis alle Stufen (inkl. laufender Batches) beendet sind
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+        finally:
+            for conn in conns:
+                conn.close()
+
+    def load(self, anzahl=STANDARD_ANZAHL):
+        """Massendaten über die Pipeline laden (Tabellen müssen bestehen)"""
+        g = self.generator
+
+        # Bereits vollständig geladene Tabellen überspringen, übrige neu beginnen
+        offen = {table: num for table, num in anzahl.items() if not g.is_loaded(table, num)}
+        for table, num in offen.items():
+            g.restart_table(table, num)
+        g.conn.commit()
+
+        if not offen:
+            return
+
+        print(f"\n=== Pipeline: {sum(offen.values())} Zeilen, {self.writers} Writer, "
+              f"Queue {self.queue_size} Batches ===")
+        start = time.perf_counter()
+        asyncio.run(self.pipeline(offen))
+        dauer = time.perf_counter() - start
+
+        for table, num in offen.items():
+            g.checkpoint.mark_batch(table, math.ceil(num / g.batch_size) - 1)
+            g.checkpoint.mark_done(table)
+        g.conn.commit()
+
+        # Gesamtdauer nahe der langsameren Stufe statt der Summe beider
+        print(f"✓ {self.zeilen} Zeilen in {dauer:.1f}s ({self.zeilen / dauer:.0f} Zeilen/s)")
+        print(f"  Erzeugen:  {self.zeit_erzeugen:.1f}s")
+        print(f"  Schreiben: {self.zeit_schreiben:.1f}s summiert, "
+              f"{self.zeit_schreiben / self.writers:.1f}s pro Writer")
+        if self.wiederholungen:
+            print(f"  {self.wiederholungen} Batches nach Deadlock wiederholt")
+
+    def run(self, anzahl=STANDARD_ANZAHL, neu_laden=False):
+        """Kompletter Import: kleine Tabellen sequentiell, Massendaten über die Pipeline"""
+        print("="*60)
+        print("GIS DUMMY-DATEN GENERATOR (ASYNC-PIPELINE)")
+        print("="*60)
+
+        g = self.generator
+        try:
+            g.connect()
+            g.prepare_tables(neu_laden)
+            g.populate_gemeindegrenzen()
+            g.populate_quartiere()
+            g.populate_hochwasserzonen()
+            g.populate_bahnhoefe()
+
+            self.load(anzahl)
+
+            # Statistiken nach dem Import auffrischen
+            GISMaintenance(g.db_config).run_after_load(g.TABELLEN)
+
+        except Exception as e:
+            print(f"\n❌ FEHLER: {e}")
+            if g.conn:
+                g.conn.rollback()
+            raise
+        finally:
+            self.producer_pool.shutdown()
+            self.writer_pool.shutdown()
+            if g.conn:
+                g.conn.close()
+
+
+if __name__ == "__main__":
+    db_config = {
+        'host': os.getenv('DB_HOST', 'localhost'),
+        'database': os.getenv('DB_NAME', 'xxx'),
+        'user': os.getenv('DB_USER', 'xxx'),
+        'password': os.getenv('DB_PASSWORD', input('Passwort: '))
+    }
+
+    # Mengen skalieren, z.B. PIPELINE_FAKTOR=1000 für 200'000 Gebäude
+    faktor = int(os.getenv('PIPELINE_FAKTOR', 1))
+    anzahl = {table: num * faktor for table, num in STANDARD_ANZAHL.items()}
+
+    generator = GISDummyDataGenerator(
+        db_config,
+        seed=int(os.getenv('GIS_SEED', 0)),
+        batch_size=int(os.getenv('GIS_BATCH_GROESSE', 500)),
+    )
+    pipeline = AsyncGenerationPipeline(
+        generator,
+        writers=int(os.getenv('PIPELINE_WRITER', 4)),
+        queue_size=int(os.getenv('PIPELINE_QUEUE', 8)),
+    )
+    pipeline.run(anzahl, neu_laden=os.getenv('GIS_NEU_LADEN') == '1')
@@ -0,0 +1,128 @@
+import hashlib
+import json
+
+# ======================================================================
+# LADEFORTSCHRITT: CHECKPOINTS FÜR WIEDERANLAUFFÄHIGE IMPORTE
+# ======================================================================
+# Die Tabelle gis_ladefortschritt hält pro Lauf (Generator) und Schritt
+# (Szenario bzw. Tabelle) fest:
+# - fingerprint:   Hash der Parameter, mit denen der Schritt geladen wurde
+# - parameter:     die Parameter selbst (zum Aufräumen alter Stände)
+# - batch:         letzter committeter Batch (-1 = noch keiner)
+# - abgeschlossen: Schritt vollständig geladen
+#
+# Batch-Fortschritt wird in derselben Transaktion wie die Daten des Batches
+# geschrieben, ein Abbruch verliert also höchstens den laufenden Batch.
+
+FORTSCHRITT_SQL = """
+    CREATE TABLE IF NOT EXISTS gis_ladefortschritt (
+        lauf VARCHAR(50) NOT NULL,
+        schritt VARCHAR(50) NOT NULL,
+        fingerprint VARCHAR(64) NOT NULL,
+        parameter JSONB,
+        batch INTEGER NOT NULL DEFAULT -1,
+        abgeschlossen BOOLEAN NOT NULL DEFAULT FALSE,
+        aktualisiert TIMESTAMPTZ NOT NULL DEFAULT now(),
+        PRIMARY KEY (lauf, schritt)
+    );
+"""
+
+
+def fingerprint(params):
+    """Stabiler Hash über die Parameter eines Schritts"""
+    payload = json.dumps(params, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class LadeCheckpoint:
+    def __init__(self, conn, lauf):
+        self.conn = conn
+        self.lauf = lauf
+
+    def install(self):
+        """Fortschrittstabelle anlegen (falls nötig)"""
+        cursor = self.conn.cursor()
+        cursor.execute(FORTSCHRITT_SQL)
+        self.conn.commit()
+
+    def exists(self):
+        """Fortschrittstabelle im aktuellen search_path vorhanden?"""
+        cursor = self.conn.cursor()
+        cursor.execute("SELECT to_regclass('gis_ladefortschritt') IS NOT NULL")
+        return cursor.fetchone()[0]
+
+    def status(self, schritt):
+        """Gespeicherter Stand eines Schritts oder None"""
+        if not self.exists():
+            return None
+
+        cursor = self.conn.cursor()
+        cursor.execute("""
+            SELECT fingerprint, parameter, batch, abgeschlossen
+            FROM gis_ladefortschritt
+            WHERE lauf = %s AND schritt = %s
+        """, (self.lauf, schritt))
+        row = cursor.fetchone()
+        if row is None:
+            return None
+
+        fp, parameter, batch, abgeschlossen = row
+        if isinstance(parameter, str):
+            parameter = json.loads(parameter)
+        return {
+            'fingerprint': fp,
+            'parameter': parameter,
+            'batch': batch,
+            'abgeschlossen': abgeschlossen,
+        }
+
+    def is_done(self, schritt, params):
+        """Schritt mit genau diesen Parametern bereits vollständig geladen?"""
+        status = self.status(schritt)
+        return (status is not None
+                and status['abgeschlossen']
+                and status['fingerprint'] == fingerprint(params))
+
+    def resume_batch(self, schritt, params):
+        """Erster noch nicht geladener Batch (0 bei Neustart oder geänderten Parametern)"""
+        status = self.status(schritt)
+        if status is None or status['fingerprint'] != fingerprint(params):
+            return 0
+        return status['batch'] + 1
+
+    def start(self, schritt, params):
+        """Schritt beginnen (setzt Batch-Fortschritt zurück), ohne Commit"""
+        cursor = self.conn.cursor()
+        cursor.execute("""
+            INSERT INTO gis_ladefortschritt (lauf, schritt, fingerprint, parameter)
+            VALUES (%s, %s, %s, %s)
+            ON CONFLICT (lauf, schritt) DO UPDATE
+            SET fingerprint = EXCLUDED.fingerprint,
+                parameter = EXCLUDED.parameter,
+                batch = -1,
+                abgeschlossen = FALSE,
+                aktualisiert = now()
+        """, (self.lauf, schritt, fingerprint(params), json.dumps(params, default=str)))
+
+    def mark_batch(self, schritt, batch):
+        """Batch als geladen markieren, ohne Commit (Commit zusammen mit den Daten)"""
+        cursor = self.conn.cursor()
+        cursor.execute("""
+            UPDATE gis_ladefortschritt
+            SET batch = %s, aktualisiert = now()
+            WHERE lauf = %s AND schritt = %s
+        """, (batch, self.lauf, schritt))
+
+    def mark_done(self, schritt):
+        """Schritt als abgeschlossen markieren, ohne Commit"""
+        cursor = self.conn.cursor()
+        cursor.execute("""
+            UPDATE gis_ladefortschritt
+            SET abgeschlossen = TRUE, aktualisiert = now()
+            WHERE lauf = %s AND schritt = %s
+        """, (self.lauf, schritt))
+
+    def reset(self):
+        """Gesamten Fortschritt dieses Laufs verwerfen, ohne Commit"""
+        cursor = self.conn.cursor()
+        cursor.execute("DELETE FROM gis_ladefortschritt WHERE lauf = %s", (self.lauf,))
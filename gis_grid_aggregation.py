@@ -0,0 +1,423 @@
+import psycopg2
+import numpy as np
+import io
+import os
+
+# ======================================================================
+# HEXAGON-RASTER: VORBERECHNETE AGGREGATE FÜR HEATMAPS
+# ======================================================================
+# Einwohner (hausanschluesse) und Geschossfläche (gebaeude) werden in
+# mehreren Auflösungen auf ein Hexagon-Raster verteilt und pro Zelle in
+# raster_aggregate gespeichert. Heatmaps lesen dann nur noch Zellen über
+# den Primärschlüssel bzw. den GiST-Index - kein ST_Within-Join mehr.
+#
+# - Neuaufbau: Features werden batchweise geladen und mit NumPy den Zellen
+#   zugeordnet, die Summen per COPY geschrieben.
+# - Laufend: Statement-Trigger mit Transition-Tabellen fassen alle Zeilen
+#   eines Statements pro Zelle zu einer Differenz zusammen und buchen sie in
+#   fester Reihenfolge (aufloesung_m, q, r). Parallele Schreiber sperren die
+#   gemeinsamen groben Zellen dadurch immer in derselben Reihenfolge und
+#   blockieren sich gegenseitig nicht zyklisch (keine Deadlocks).
+#   Geleerte Zellen bleiben bis zum nächsten Neuaufbau mit 0 stehen.
+#
+# Zellen sind spitze Hexagone (axiale Koordinaten q/r), Ursprung im
+# LV95-Nullpunkt; die Auflösung ist der Abstand Mittelpunkt-Ecke in Metern.
+# Python und SQL rechnen in double precision mit derselben Rundung, damit
+# beide Wege auch für Punkte auf Zellgrenzen dieselbe Zelle liefern - die
+# Trigger buchen Differenzen auf die Zellen, die der Neuaufbau gefüllt hat.
+
+URSPRUNG_X = 2600000
+URSPRUNG_Y = 1200000
+
+STANDARD_AUFLOESUNGEN = [50, 100, 250, 500]
+
+# Quelle -> Punkt-Ausdruck, Zähl- und Summenspalte
+RASTER_QUELLEN = {
+    'hausanschluesse': {
+        'punkt': '{g}',
+        'anzahl': 'anzahl_anschluesse',
+        'summe': 'einwohner',
+        'wert': 'einwohner',
+    },
+    'gebaeude': {
+        'punkt': 'ST_PointOnSurface({g})',
+        'anzahl': 'anzahl_gebaeude',
+        'summe': 'geschossflaeche_m2',
+        'wert': 'geschossflaeche_m2',
+    },
+}
+
+RASTER_SQL = f"""
+    CREATE TABLE IF NOT EXISTS raster_aufloesungen (
+        aufloesung_m DOUBLE PRECISION PRIMARY KEY
+    );
+
+    CREATE TABLE IF NOT EXISTS raster_aggregate (
+        aufloesung_m DOUBLE PRECISION NOT NULL,
+        q INTEGER NOT NULL,
+        r INTEGER NOT NULL,
+        anzahl_anschluesse INTEGER NOT NULL DEFAULT 0,
+        einwohner BIGINT NOT NULL DEFAULT 0,
+        anzahl_gebaeude INTEGER NOT NULL DEFAULT 0,
+        geschossflaeche_m2 NUMERIC NOT NULL DEFAULT 0,
+        geom GEOMETRY(Polygon, 2056),
+        PRIMARY KEY (aufloesung_m, q, r)
+    );
+
+    CREATE INDEX IF NOT EXISTS idx_raster_aggregate_geom
+    ON raster_aggregate USING GIST(geom);
+
+    -- Zelle eines Punktes (gleiche Rechnung wie hex_cells in Python)
+    CREATE OR REPLACE FUNCTION gis_hex_zelle(
+        x DOUBLE PRECISION, y DOUBLE PRECISION, groesse DOUBLE PRECISION,
+        OUT q INTEGER, OUT r INTEGER
+    ) AS $$
+    DECLARE
+        px DOUBLE PRECISION := (x - {URSPRUNG_X}) / groesse;
+        py DOUBLE PRECISION := (y - {URSPRUNG_Y}) / groesse;
+        qf DOUBLE PRECISION;
+        rf DOUBLE PRECISION;
+        sf DOUBLE PRECISION;
+        rq DOUBLE PRECISION;
+        rr DOUBLE PRECISION;
+        rs DOUBLE PRECISION;
+    BEGIN
+        -- Konstanten in double precision wie NumPy (nicht numeric)
+        qf := sqrt(3.0::float8) / 3.0::float8 * px - py / 3.0::float8;
+        rf := 2.0::float8 / 3.0::float8 * py;
+        sf := -qf - rf;
+
+        rq := floor(qf + 0.5);
+        rr := floor(rf + 0.5);
+        rs := floor(sf + 0.5);
+
+        IF abs(rq - qf) > abs(rr - rf) AND abs(rq - qf) > abs(rs - sf) THEN
+            rq := -rr - rs;
+        ELSIF abs(rr - rf) > abs(rs - sf) THEN
+            rr := -rq - rs;
+        END IF;
+
+        q := rq::INTEGER;
+        r := rr::INTEGER;
+    END;
+    $$ LANGUAGE plpgsql IMMUTABLE STRICT;
+
+    -- Hexagon-Geometrie einer Zelle
+    CREATE OR REPLACE FUNCTION gis_hex_polygon(
+        q INTEGER, r INTEGER, groesse DOUBLE PRECISION
+    ) RETURNS GEOMETRY AS $$
+        SELECT ST_SetSRID(ST_MakePolygon(ST_MakeLine(ARRAY(
+            SELECT ST_MakePoint(
+                {URSPRUNG_X} + groesse * (sqrt(3.0::float8) * q
+                                          + sqrt(3.0::float8) / 2.0::float8 * r)
+                    + groesse * cos(radians(60 * (i % 6) - 30)),
+                {URSPRUNG_Y} + groesse * 1.5 * r
+                    + groesse * sin(radians(60 * (i % 6) - 30))
+            )
+            FROM generate_series(0, 6) i
+            ORDER BY i
+        ))), 2056)
+    $$ LANGUAGE sql IMMUTABLE STRICT;
+"""
+
+
+def hex_cells(x, y, groesse):
+    """Axiale Hexagon-Koordinaten (q, r) für Koordinaten-Arrays"""
+    px = (np.asarray(x, dtype=np.float64) - URSPRUNG_X) / groesse
+    py = (np.asarray(y, dtype=np.float64) - URSPRUNG_Y) / groesse
+
+    qf = np.sqrt(3.0) / 3.0 * px - py / 3.0
+    rf = 2.0 / 3.0 * py
+    sf = -qf - rf
+
+    rq = np.floor(qf + 0.5)
+    rr = np.floor(rf + 0.5)
+    rs = np.floor(sf + 0.5)
+
+    dq = np.abs(rq - qf)
+    dr = np.abs(rr - rf)
+    ds = np.abs(rs - sf)
+
+    # Würfelkoordinaten runden: die Achse mit grösster Abweichung korrigieren
+    fix_q = (dq > dr) & (dq > ds)
+    fix_r = ~fix_q & (dr > ds)
+    rq = np.where(fix_q, -rr - rs, rq)
+    rr = np.where(fix_r, -rq - rs, rr)
+
+    return rq.astype(np.int64), rr.astype(np.int64)
+
+
+def aggregate_cells(q, r, werte):
+    """Anzahl und Summe pro Zelle"""
+    zellen = np.stack((q, r), axis=1)
+    eindeutig, index = np.unique(zellen, axis=0, return_inverse=True)
+    index = index.reshape(-1)
+    anzahl = np.bincount(index, minlength=len(eindeutig))
+    summe = np.bincount(index, weights=werte, minlength=len(eindeutig))
+    return eindeutig, anzahl, summe
+
+
+class GISGridAggregation:
+    def __init__(self, db_config, aufloesungen=STANDARD_AUFLOESUNGEN, batch_size=100000):
+        self.db_config = db_config
+        self.conn = None
+        self.aufloesungen = [float(a) for a in aufloesungen]
+        self.batch_size = batch_size
+
+    def connect(self):
+        """Verbinde mit PostgreSQL"""
+        self.conn = psycopg2.connect(**self.db_config)
+        self.conn.autocommit = False
+        print("✓ Datenbankverbindung hergestellt")
+
+    def install(self):
+        """Tabellen, Funktionen und Trigger für die Rasteraggregate anlegen"""
+        cursor = self.conn.cursor()
+        cursor.execute(RASTER_SQL)
+
+        for aufloesung in self.aufloesungen:
+            cursor.execute("""
+                INSERT INTO raster_aufloesungen (aufloesung_m) VALUES (%s)
+                ON CONFLICT DO NOTHING
+            """, (aufloesung,))
+
+        for table, quelle in RASTER_QUELLEN.items():
+            self.create_trigger(table, quelle)
+
+        self.conn.commit()
+        print(f"✓ Raster eingerichtet (Auflösungen: "
+              f"{', '.join(f'{a:g}m' for a in self.aufloesungen)})")
+
+    def delta_sql(self, quelle, aenderungen):
+        """
+        Differenzen eines Statements pro Zelle zusammenfassen und buchen
+
+        aenderungen: SELECT mit Spalten (vorzeichen, geom, wert) über die
+        Transition-Tabellen
+        """
+        anzahl, summe = quelle['anzahl'], quelle['summe']
+        punkt = quelle['punkt'].format(g='e.geom')
+        return f"""
+            WITH aenderung AS (
+                {aenderungen}
+            ),
+            delta AS (
+                SELECT a.aufloesung_m, z.q, z.r,
+                       SUM(e.vorzeichen) AS n,
+                       SUM(e.vorzeichen * COALESCE(e.wert, 0)) AS s
+                FROM aenderung e
+                CROSS JOIN LATERAL (SELECT {punkt} AS pkt) p
+                CROSS JOIN raster_aufloesungen a
+                CROSS JOIN LATERAL gis_hex_zelle(ST_X(p.pkt), ST_Y(p.pkt), a.aufloesung_m) z
+                WHERE e.geom IS NOT NULL
+                GROUP BY a.aufloesung_m, z.q, z.r
+                HAVING SUM(e.vorzeichen) <> 0
+                    OR SUM(e.vorzeichen * COALESCE(e.wert, 0)) <> 0
+            )
+            INSERT INTO raster_aggregate (aufloesung_m, q, r, {anzahl}, {summe}, geom)
+            SELECT aufloesung_m, q, r, n, s, gis_hex_polygon(q, r, aufloesung_m)
+            FROM delta
+            ORDER BY aufloesung_m, q, r
+            ON CONFLICT (aufloesung_m, q, r) DO UPDATE
+            SET {anzahl} = raster_aggregate.{anzahl} + EXCLUDED.{anzahl},
+                {summe} = raster_aggregate.{summe} + EXCLUDED.{summe};
+        """
+
+    def create_trigger(self, table, quelle):
+        """Statement-Trigger die Änderungen als Differenz in die Zellen buchen"""
+        cursor = self.conn.cursor()
+        anzahl, summe, wert = quelle['anzahl'], quelle['summe'], quelle['wert']
+
+        neu = f"SELECT 1 AS vorzeichen, geom, {wert} AS wert FROM raster_neu"
+        alt = f"SELECT -1 AS vorzeichen, geom, {wert} AS wert FROM raster_alt"
+
+        cursor.execute(f"""
+            CREATE OR REPLACE FUNCTION {table}_raster_anpassen() RETURNS trigger AS $$
+            BEGIN
+                IF TG_OP = 'INSERT' THEN
+                    {self.delta_sql(quelle, neu)}
+                ELSIF TG_OP = 'DELETE' THEN
+                    {self.delta_sql(quelle, alt)}
+                ELSIF TG_OP = 'UPDATE' THEN
+                    {self.delta_sql(quelle, f"{neu} UNION ALL {alt}")}
+                ELSE
+                    -- TRUNCATE: Anteil dieser Quelle aus allen Zellen entfernen
+                    UPDATE raster_aggregate
+                    SET {anzahl} = 0, {summe} = 0
+                    WHERE (aufloesung_m, q, r) IN (
+                        SELECT aufloesung_m, q, r
+                        FROM raster_aggregate
+                        WHERE {anzahl} <> 0 OR {summe} <> 0
+                        ORDER BY aufloesung_m, q, r
+                        FOR UPDATE
+                    );
+                    DELETE FROM raster_aggregate
+                    WHERE anzahl_anschluesse = 0 AND anzahl_gebaeude = 0;
+                END IF;
+
+                RETURN NULL;
+            END;
+            $$ LANGUAGE plpgsql;
+
+            -- Transition-Tabellen erlauben nur ein Ereignis pro Trigger
+            DROP TRIGGER IF EXISTS trg_{table}_raster_ins ON {table};
+            DROP TRIGGER IF EXISTS trg_{table}_raster_upd ON {table};
+            DROP TRIGGER IF EXISTS trg_{table}_raster_del ON {table};
+            DROP TRIGGER IF EXISTS trg_{table}_raster_trunc ON {table};
+
+            CREATE TRIGGER trg_{table}_raster_ins
+            AFTER INSERT ON {table}
+            REFERENCING NEW TABLE AS raster_neu
+            FOR EACH STATEMENT EXECUTE FUNCTION {table}_raster_anpassen();
+
+            CREATE TRIGGER trg_{table}_raster_upd
+            AFTER UPDATE ON {table}
+            REFERENCING OLD TABLE AS raster_alt NEW TABLE AS raster_neu
+            FOR EACH STATEMENT EXECUTE FUNCTION {table}_raster_anpassen();
+
+            CREATE TRIGGER trg_{table}_raster_del
+            AFTER DELETE ON {table}
+            REFERENCING OLD TABLE AS raster_alt
+            FOR EACH STATEMENT EXECUTE FUNCTION {table}_raster_anpassen();
+
+            CREATE TRIGGER trg_{table}_raster_trunc
+            AFTER TRUNCATE ON {table}
+            FOR EACH STATEMENT EXECUTE FUNCTION {table}_raster_anpassen();
+        """)
+
+    def bin_source(self, table, quelle, import_buffer):
+        """Features einer Quelle batchweise den Zellen aller Auflösungen zuordnen"""
+        punkt = quelle['punkt'].format(g='geom')
+        cursor = self.conn.cursor(name=f"raster_{table}")  # Serverseitiger Cursor
+        cursor.execute(f"""
+            SELECT ST_X({punkt}), ST_Y({punkt}), COALESCE({quelle['wert']}, 0)
+            FROM {table}
+            WHERE geom IS NOT NULL
+        """)
+
+        total = 0
+        while True:
+            batch = cursor.fetchmany(self.batch_size)
+            if not batch:
+                break
+
+            daten = np.array(batch, dtype=np.float64)
+            total += len(daten)
+
+            for aufloesung in self.aufloesungen:
+                q, r = hex_cells(daten[:, 0], daten[:, 1], aufloesung)
+                zellen, anzahl, summe = aggregate_cells(q, r, daten[:, 2])
+
+                for (zq, zr), n, s in zip(zellen, anzahl, summe):
+                    import_buffer.write(
+                        f"{table}\t{aufloesung}\t{zq}\t{zr}\t{n}\t{s}\n"
+                    )
+
+        cursor.close()
+        return total
+
+    def rebuild(self):
+        """Alle Rasteraggregate vollständig neu berechnen"""
+        cursor = self.conn.cursor()
+
+        # Keine Änderungen während des Neuaufbaus (Trigger würden doppelt buchen)
+        cursor.execute(f"LOCK TABLE {', '.join(RASTER_QUELLEN)} IN SHARE MODE")
+
+        import_buffer = io.StringIO()
+        for table, quelle in RASTER_QUELLEN.items():
+            anzahl = self.bin_source(table, quelle, import_buffer)
+            print(f"  {table}: {anzahl} Features zugeordnet")
+        import_buffer.seek(0)
+
+        cursor.execute("""
+            CREATE TEMP TABLE raster_import (
+                quelle TEXT,
+                aufloesung_m DOUBLE PRECISION,
+                q INTEGER,
+                r INTEGER,
+                anzahl BIGINT,
+                summe NUMERIC
+            ) ON COMMIT DROP
+        """)
+        cursor.copy_expert("COPY raster_import FROM STDIN", import_buffer)
+
+        cursor.execute("""
+            DELETE FROM raster_aggregate WHERE aufloesung_m = ANY(%s)
+        """, (self.aufloesungen,))
+        cursor.execute("""
+            INSERT INTO raster_aggregate
+                (aufloesung_m, q, r, anzahl_anschluesse, einwohner,
+                 anzahl_gebaeude, geschossflaeche_m2, geom)
+            SELECT
+                aufloesung_m, q, r,
+                COALESCE(SUM(anzahl) FILTER (WHERE quelle = 'hausanschluesse'), 0),
+                COALESCE(SUM(summe) FILTER (WHERE quelle = 'hausanschluesse'), 0),
+                COALESCE(SUM(anzahl) FILTER (WHERE quelle = 'gebaeude'), 0),
+                COALESCE(SUM(summe) FILTER (WHERE quelle = 'gebaeude'), 0),
+                gis_hex_polygon(q, r, aufloesung_m)
+            FROM raster_import
+            GROUP BY aufloesung_m, q, r
+        """)
+        zellen = cursor.rowcount
+
+        self.conn.commit()
+        print(f"✓ {zellen} Zellen geschrieben")
+
+    def heatmap(self, aufloesung, bbox=None):
+        """
+        Zellen einer Auflösung für eine Heatmap
+
+        bbox: optional (xmin, ymin, xmax, ymax) in LV95
+        """
+        cursor = self.conn.cursor()
+        sql = """
+            SELECT q, r, anzahl_anschluesse, einwohner, anzahl_gebaeude,
+                   geschossflaeche_m2, ST_AsGeoJSON(geom)
+            FROM raster_aggregate
+            WHERE aufloesung_m = %(aufloesung)s
+            AND (anzahl_anschluesse > 0 OR anzahl_gebaeude > 0)
+        """
+        params = {'aufloesung': float(aufloesung)}
+
+        if bbox:
+            sql += " AND geom && ST_MakeEnvelope(%(xmin)s, %(ymin)s, %(xmax)s, %(ymax)s, 2056)"
+            params.update(dict(zip(('xmin', 'ymin', 'xmax', 'ymax'), bbox)))
+
+        cursor.execute(sql, params)
+        columns = [desc[0] for desc in cursor.description]
+        return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+    def run(self):
+        """Raster einrichten und Aggregate neu aufbauen"""
+        print("="*60)
+        print("HEXAGON-RASTER FÜR HEATMAPS")
+        print("="*60)
+
+        try:
+            self.connect()
+            self.install()
+            self.rebuild()
+
+            for aufloesung in self.aufloesungen:
+                zellen = self.heatmap(aufloesung)
+                print(f"  {aufloesung:g}m: {len(zellen)} Zellen, "
+                      f"{sum(z['einwohner'] for z in zellen)} Einwohner")
+
+        except Exception as e:
+            print(f"\n❌ FEHLER: {e}")
+            if self.conn:
+                self.conn.rollback()
+        finally:
+            if self.conn:
+                self.conn.close()
+
+
+if __name__ == "__main__":
+    db_config = {
+        'host': os.getenv('DB_HOST', 'localhost'),
+        'database': os.getenv('DB_NAME', 'xxx'),
+        'user': os.getenv('DB_USER', 'xxx'),
+        'password': os.getenv('DB_PASSWORD', input('Passwort: '))
+    }
+
+    GISGridAggregation(db_config).run()
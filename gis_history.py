@@ -0,0 +1,278 @@
+import psycopg2
+import os
+
+# ======================================================================
+# BITEMPORALE HISTORIE FÜR GEBÄUDE, PARZELLEN UND WERKLEITUNGEN
+# ======================================================================
+# Trigger schreiben jede Version einer Zeile in <tabelle>_historie mit zwei
+# Zeitbereichen:
+# - gueltigkeit: Gültigkeitszeit (wann der Zustand in der Realität galt).
+#                Standard ist der Transaktionsbeginn, übersteuerbar mit
+#                SET LOCAL gis.gueltig_ab = '2020-01-01' vor der Änderung.
+# - erfassung:   Transaktionszeit (wann die Datenbank diesen Stand kannte).
+#
+# Geschlossene Versionen werden nicht überschrieben: die alte Erfassung wird
+# beendet und eine neue Version mit beendeter Gültigkeit angehängt. Bei
+# rückdatierten Änderungen betrifft das jede noch erfasste Version, die ab
+# gis.gueltig_ab gilt; erneut erfasst wird nur ihr Teil vor gis.gueltig_ab.
+# As-of-Abfragen laufen über einen GiST-Index auf (gueltigkeit, erfassung),
+# ihre Kosten hängen von der Ergebnisgrösse ab, nicht von der Historienlänge.
+
+# Tabelle -> Primärschlüssel. Fachliche IDs wie leitung_id sind nicht
+# eindeutig: bei Duplikaten würde eine Änderung die Versionen beider Zeilen
+# abschliessen
+HISTORIE_TABELLEN = {
+    'gebaeude': 'gebaeude_id',
+    'parzellen': 'id',
+    'werkleitungen': 'id',
+}
+
+
+class GISHistory:
+    def __init__(self, db_config):
+        self.db_config = db_config
+        self.conn = None
+
+    def connect(self):
+        """Verbinde mit PostgreSQL"""
+        self.conn = psycopg2.connect(**self.db_config)
+        self.conn.autocommit = False
+        print("✓ Datenbankverbindung hergestellt")
+
+    def source_columns(self, table):
+        """Spalten der Quelltabelle (ohne berechnete Spalten)"""
+        cursor = self.conn.cursor()
+        cursor.execute("""
+            SELECT column_name, format_type(a.atttypid, a.atttypmod)
+            FROM information_schema.columns c
+            JOIN pg_attribute a
+              ON a.attrelid = (quote_ident(c.table_schema) || '.' || quote_ident(c.table_name))::regclass
+             AND a.attname = c.column_name
+            WHERE c.table_schema = current_schema()
+            AND c.table_name = %s
+            AND c.is_generated = 'NEVER'
+            ORDER BY c.ordinal_position
+        """, (table,))
+        return cursor.fetchall()
+
+    def create_history_table(self, table, key, columns):
+        """Historientabelle mit Zeitbereichen und Indizes anlegen"""
+        cursor = self.conn.cursor()
+        historie = f"{table}_historie"
+
+        spalten = ",\n".join(f"                {name} {typ}" for name, typ in columns)
+        cursor.execute(f"""
+            CREATE TABLE IF NOT EXISTS {historie} (
+                hist_id BIGSERIAL PRIMARY KEY,
+{spalten},
+                gueltigkeit TSTZRANGE NOT NULL,
+                erfassung TSTZRANGE NOT NULL,
+                operation CHAR(1) NOT NULL
+            )
+        """)
+
+        # As-of-Abfragen: Zeitpunkt in beiden Bereichen
+        cursor.execute(f"""
+            CREATE INDEX IF NOT EXISTS idx_{historie}_zeit
+            ON {historie} USING GIST(gueltigkeit, erfassung)
+        """)
+        # Räumliche As-of-Abfragen
+        cursor.execute(f"""
+            CREATE INDEX IF NOT EXISTS idx_{historie}_geom
+            ON {historie} USING GIST(geom)
+        """)
+        # Trigger findet die noch erfassten Versionen eines Objekts ohne Historien-Scan
+        cursor.execute(f"""
+            CREATE INDEX IF NOT EXISTS idx_{historie}_offen
+            ON {historie} ({key})
+            WHERE upper_inf(erfassung)
+        """)
+        # Änderungen seit ...: Historie wächst in Erfassungsreihenfolge -> BRIN
+        cursor.execute(f"""
+            CREATE INDEX IF NOT EXISTS idx_{historie}_erfasst
+            ON {historie} USING BRIN(lower(erfassung))
+        """)
+
+    def create_trigger(self, table, key, columns):
+        """Trigger der jede Änderung als neue Version festhält"""
+        cursor = self.conn.cursor()
+        historie = f"{table}_historie"
+
+        namen = [name for name, _ in columns]
+        spalten = ", ".join(namen)
+        neu = ", ".join(f"NEW.{name}" for name in namen)
+
+        cursor.execute(f"""
+            CREATE OR REPLACE FUNCTION {table}_historie_erfassen() RETURNS trigger AS $$
+            DECLARE
+                jetzt TIMESTAMPTZ := now();
+                gueltig_ab TIMESTAMPTZ := COALESCE(
+                    NULLIF(current_setting('gis.gueltig_ab', true), '')::timestamptz,
+                    now()
+                );
+            BEGIN
+                IF TG_OP IN ('UPDATE', 'DELETE') THEN
+                    -- Erfassung aller Versionen beenden, die ab gueltig_ab gelten
+                    -- (bei Rückdatierung auch ältere), und den Teil vor
+                    -- gueltig_ab mit beendeter Gültigkeit erneut erfassen
+                    WITH alt AS (
+                        UPDATE {historie}
+                        SET erfassung = tstzrange(lower(erfassung), jetzt)
+                        WHERE {key} = OLD.{key}
+                        AND upper_inf(erfassung)
+                        AND gueltigkeit && tstzrange(gueltig_ab, NULL)
+                        RETURNING *
+                    )
+                    INSERT INTO {historie} ({spalten}, gueltigkeit, erfassung, operation)
+                    SELECT {spalten},
+                           tstzrange(lower(gueltigkeit), LEAST(gueltig_ab, upper(gueltigkeit))),
+                           tstzrange(jetzt, NULL),
+                           left(TG_OP, 1)
+                    FROM alt
+                    WHERE lower(gueltigkeit) < gueltig_ab;
+                END IF;
+
+                IF TG_OP IN ('INSERT', 'UPDATE') THEN
+                    INSERT INTO {historie} ({spalten}, gueltigkeit, erfassung, operation)
+                    VALUES ({neu}, tstzrange(gueltig_ab, NULL), tstzrange(jetzt, NULL),
+                            left(TG_OP, 1));
+                END IF;
+
+                RETURN NULL;
+            END;
+            $$ LANGUAGE plpgsql;
+
+            DROP TRIGGER IF EXISTS trg_{table}_historie ON {table};
+            CREATE TRIGGER trg_{table}_historie
+            AFTER INSERT OR UPDATE OR DELETE ON {table}
+            FOR EACH ROW EXECUTE FUNCTION {table}_historie_erfassen();
+        """)
+
+    def seed_history(self, table, key, columns):
+        """
+        Bestehende Zeilen als erste Version übernehmen
+
+        Aktuelle Versionen ohne identische Zeile in der Tabelle (z.B. nach
+        DROP/CREATE durch den Generator, wenn die SERIAL-IDs neu beginnen)
+        werden zuerst wie ein DELETE abgeschlossen.
+        """
+        cursor = self.conn.cursor()
+        historie = f"{table}_historie"
+        namen = [name for name, _ in columns]
+        spalten = ", ".join(namen)
+        gleich = " AND ".join(f"t.{name} IS NOT DISTINCT FROM h.{name}" for name in namen)
+
+        cursor.execute(f"""
+            WITH alt AS (
+                UPDATE {historie} h
+                SET erfassung = tstzrange(lower(h.erfassung), now())
+                WHERE upper_inf(h.gueltigkeit)
+                AND upper_inf(h.erfassung)
+                AND NOT EXISTS (
+                    SELECT 1 FROM {table} t
+                    WHERE t.{key} = h.{key}
+                    AND {gleich}
+                )
+                RETURNING h.*
+            )
+            INSERT INTO {historie} ({spalten}, gueltigkeit, erfassung, operation)
+            SELECT {spalten},
+                   tstzrange(lower(gueltigkeit), GREATEST(now(), lower(gueltigkeit))),
+                   tstzrange(now(), NULL),
+                   'D'
+            FROM alt
+        """)
+        abgeschlossen = cursor.rowcount
+
+        cursor.execute(f"""
+            INSERT INTO {historie} ({spalten}, gueltigkeit, erfassung, operation)
+            SELECT {spalten}, tstzrange(now(), NULL), tstzrange(now(), NULL), 'I'
+            FROM {table} t
+            WHERE NOT EXISTS (
+                SELECT 1 FROM {historie} h
+                WHERE h.{key} = t.{key}
+                AND upper_inf(h.gueltigkeit)
+                AND upper_inf(h.erfassung)
+            )
+        """)
+        return cursor.rowcount, abgeschlossen
+
+    def install(self, tables=HISTORIE_TABELLEN):
+        """Historie für alle Tabellen einrichten"""
+        for table, key in tables.items():
+            columns = self.source_columns(table)
+            self.create_history_table(table, key, columns)
+            self.create_trigger(table, key, columns)
+            uebernommen, abgeschlossen = self.seed_history(table, key, columns)
+            print(f"✓ {table}_historie eingerichtet ({uebernommen} Zeilen übernommen, "
+                  f"{abgeschlossen} veraltete Versionen abgeschlossen)")
+
+        self.conn.commit()
+
+    def as_of(self, table, gueltig_am, erfasst_am=None, bbox=None):
+        """
+        Zustand einer Tabelle zu einem Zeitpunkt
+
+        gueltig_am: Zeitpunkt in der Realität
+        erfasst_am: Wissensstand der Datenbank (Standard: jetzt)
+        bbox:       optional (xmin, ymin, xmax, ymax) in LV95
+        """
+        cursor = self.conn.cursor()
+        historie = f"{table}_historie"
+
+        sql = f"""
+            SELECT *
+            FROM {historie}
+            WHERE gueltigkeit @> %(gueltig_am)s::timestamptz
+            AND erfassung @> COALESCE(%(erfasst_am)s::timestamptz, now())
+        """
+        params = {'gueltig_am': gueltig_am, 'erfasst_am': erfasst_am}
+
+        if bbox:
+            sql += " AND geom && ST_MakeEnvelope(%(xmin)s, %(ymin)s, %(xmax)s, %(ymax)s, 2056)"
+            params.update(dict(zip(('xmin', 'ymin', 'xmax', 'ymax'), bbox)))
+
+        cursor.execute(sql, params)
+        columns = [desc[0] for desc in cursor.description]
+        return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+    def versions(self, table, key_value):
+        """Alle erfassten Versionen eines Objekts"""
+        cursor = self.conn.cursor()
+        key = HISTORIE_TABELLEN[table]
+        cursor.execute(f"""
+            SELECT *
+            FROM {table}_historie
+            WHERE {key} = %s
+            ORDER BY lower(erfassung), lower(gueltigkeit)
+        """, (key_value,))
+        columns = [desc[0] for desc in cursor.description]
+        return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+    def run(self):
+        """Richte die Historie ein"""
+        print("="*60)
+        print("BITEMPORALE HISTORIE")
+        print("="*60)
+
+        try:
+            self.connect()
+            self.install()
+        except Exception as e:
+            print(f"\n❌ FEHLER: {e}")
+            if self.conn:
+                self.conn.rollback()
+        finally:
+            if self.conn:
+                self.conn.close()
+
+
+if __name__ == "__main__":
+    db_config = {
+        'host': os.getenv('DB_HOST', 'localhost'),
+        'database': os.getenv('DB_NAME', 'xxx'),
+        'user': os.getenv('DB_USER', 'xxx'),
+        'password': os.getenv('DB_PASSWORD', input('Passwort: '))
+    }
+
+    GISHistory(db_config).run()
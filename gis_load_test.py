@@ -0,0 +1,196 @@
+import psycopg2
+from collections import Counter, defaultdict
+import math
+import os
+import random
+import threading
+import time
+
+from gis_analysis_catalog import get_analyse, resolve_parameter
+
+# ======================================================================
+# LASTTEST: GEMISCHTE SZENARIO-ABFRAGEN VON VIELEN CLIENTS
+# ======================================================================
+# Simuliert Planer, Kartenclient und Berichtsjobs gleichzeitig: jeder Client
+# hat eine eigene Verbindung, wählt Abfragen gewichtet aus dem Katalog und
+# wartet zwischen zwei Abfragen eine zufällige Denkzeit. Parallel werden in
+# pg_stat_activity Lock- und IO-Wartezustände der Test-Sessions gezählt.
+
+# Gewichteter Mix der Szenario-Abfragen
+STANDARD_MIX = {
+    'hochwasser_risiko': 3,
+    'bahnhof_entwicklung': 3,
+    'netz_versorgung': 2,
+    'quartier_verdichtung': 2,
+}
+
+APPLICATION_NAME = 'gis_lasttest'
+
+
+def perzentil(werte, p):
+    """Perzentil nach Nearest-Rank (werte sortiert)"""
+    if not werte:
+        return None
+    index = max(0, math.ceil(p / 100 * len(werte)) - 1)
+    return werte[index]
+
+
+class GISLoadTester:
+    def __init__(self, db_config, mix=None, clients=8, think_time=0.5,
+                 duration=60, sample_interval=1.0):
+        self.db_config = db_config
+        self.mix = mix or STANDARD_MIX
+        self.clients = clients
+        self.think_time = think_time  # Mittlere Denkzeit in Sekunden (0 = keine)
+        self.duration = duration
+        self.sample_interval = sample_interval
+
+        self.stop = threading.Event()
+        self.lock = threading.Lock()
+        self.latenzen = defaultdict(list)
+        self.fehler = Counter()
+        self.wartezustaende = Counter()
+        self.blockiert = 0
+        self.stichproben = 0
+
+    def connect(self):
+        """Eigene Verbindung pro Client, erkennbar in pg_stat_activity"""
+        conn = psycopg2.connect(**self.db_config, application_name=APPLICATION_NAME)
+        conn.autocommit = True
+        return conn
+
+    def client(self, client_id):
+        """Ein Client: gewichtete Abfragen mit Denkzeit bis zum Testende"""
+        rng = random.Random(client_id)
+        analysen = list(self.mix)
+        gewichte = [self.mix[a] for a in analysen]
+        abfragen = {
+            a: (get_analyse(a)['sql'], resolve_parameter(get_analyse(a)))
+            for a in analysen
+        }
+
+        conn = self.connect()
+        try:
+            cursor = conn.cursor()
+            while not self.stop.is_set():
+                analyse_id = rng.choices(analysen, weights=gewichte)[0]
+                sql, params = abfragen[analyse_id]
+
+                start = time.perf_counter()
+                try:
+                    cursor.execute(sql, params)
+                    cursor.fetchall()
+                except psycopg2.Error as e:
+                    with self.lock:
+                        self.fehler[f"{analyse_id}: {e.pgcode or type(e).__name__}"] += 1
+                else:
+                    latenz = time.perf_counter() - start
+                    with self.lock:
+                        self.latenzen[analyse_id].append(latenz)
+
+                if self.think_time > 0:
+                    self.stop.wait(rng.expovariate(1 / self.think_time))
+        finally:
+            conn.close()
+
+    def sampler(self):
+        """Wartezustände der Test-Sessions aus pg_stat_activity sammeln"""
+        conn = self.connect()
+        try:
+            cursor = conn.cursor()
+            while not self.stop.wait(self.sample_interval):
+                cursor.execute("""
+                    SELECT
+                        COALESCE(wait_event_type, 'CPU/aktiv'),
+                        COALESCE(wait_event, '-'),
+                        cardinality(pg_blocking_pids(pid)) > 0
+                    FROM pg_stat_activity
+                    WHERE application_name = %s
+                    AND state = 'active'
+                    AND pid <> pg_backend_pid()
+                """, (APPLICATION_NAME,))
+
+                with self.lock:
+                    self.stichproben += 1
+                    for wait_type, wait_event, blockiert in cursor.fetchall():
+                        self.wartezustaende[(wait_type, wait_event)] += 1
+                        if blockiert:
+                            self.blockiert += 1
+        finally:
+            conn.close()
+
+    def report(self, dauer):
+        """Durchsatz, Latenz-Perzentile und Wartezustände ausgeben"""
+        alle = sorted(l for werte in self.latenzen.values() for l in werte)
+
+        print("\n" + "="*60)
+        print("ERGEBNIS")
+        print("="*60)
+        print(f"  Abfragen:   {len(alle)} in {dauer:.1f}s")
+        print(f"  Durchsatz:  {len(alle) / dauer:.1f} Abfragen/s")
+        print(f"  Fehler:     {sum(self.fehler.values())}")
+
+        print(f"\n  {'Analyse':24s} {'Anzahl':>7s} {'p50':>9s} {'p95':>9s} {'p99':>9s} {'max':>9s}")
+        zeilen = sorted(self.latenzen.items()) + [('TOTAL', alle)]
+        for analyse_id, werte in zeilen:
+            werte = sorted(werte)
+            if not werte:
+                continue
+            p50, p95, p99 = (perzentil(werte, p) * 1000 for p in (50, 95, 99))
+            print(f"  {analyse_id:24s} {len(werte):7d} {p50:8.1f}ms {p95:8.1f}ms "
+                  f"{p99:8.1f}ms {werte[-1] * 1000:8.1f}ms")
+
+        print(f"\n  Wartezustände ({self.stichproben} Stichproben, aktive Sessions):")
+        for (wait_type, wait_event), anzahl in self.wartezustaende.most_common(10):
+            print(f"    {wait_type:12s} {wait_event:28s} {anzahl:6d}")
+        print(f"    Durch Locks blockiert: {self.blockiert}")
+
+        for fehler, anzahl in self.fehler.most_common(5):
+            print(f"  ❌ {fehler} ({anzahl}x)")
+
+    def run(self):
+        """Lasttest durchführen"""
+        print("="*60)
+        print(f"LASTTEST ({self.clients} Clients, Denkzeit {self.think_time}s, "
+              f"{self.duration}s)")
+        print("="*60)
+        for analyse_id, gewicht in self.mix.items():
+            print(f"  {gewicht:3d} x {get_analyse(analyse_id)['titel']}")
+
+        threads = [threading.Thread(target=self.sampler, daemon=True)]
+        threads += [
+            threading.Thread(target=self.client, args=(i,), daemon=True)
+            for i in range(self.clients)
+        ]
+
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+
+        try:
+            self.stop.wait(self.duration)
+        except KeyboardInterrupt:
+            print("\n  Abbruch - werte bisherige Messungen aus")
+        finally:
+            self.stop.set()
+            for thread in threads:
+                thread.join()
+
+        self.report(time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    db_config = {
+        'host': os.getenv('DB_HOST', 'localhost'),
+        'database': os.getenv('DB_NAME', 'xxx'),
+        'user': os.getenv('DB_USER', 'xxx'),
+        'password': os.getenv('DB_PASSWORD', input('Passwort: '))
+    }
+
+    tester = GISLoadTester(
+        db_config,
+        clients=int(os.getenv('LAST_CLIENTS', 8)),
+        think_time=float(os.getenv('LAST_DENKZEIT', 0.5)),
+        duration=float(os.getenv('LAST_DAUER', 60)),
+    )
+    tester.run()
@@ -0,0 +1,214 @@
+import psycopg2
+from concurrent.futures import ThreadPoolExecutor
+import json
+import os
+import time
+
+# ======================================================================
+# AUTOMATISCHE WARTUNG: VACUUM / ANALYZE NACH MASSENIMPORTEN
+# ======================================================================
+# Beobachtet pg_stat_user_tables und führt VACUUM/ANALYZE in eigenen
+# Autocommit-Sessions aus (VACUUM darf nicht in einer Transaktion laufen).
+# Pro Aktion wird protokolliert, wie sich Plankosten und Laufzeit ändern.
+
+# Testabfragen pro Tabelle, mit denen die Wirkung der Wartung gemessen wird
+MESS_ABFRAGEN = {
+    'werkleitungen': """
+        SELECT leitung_id, von_knoten, zu_knoten
+        FROM werkleitungen
+        WHERE von_knoten = 'HV_001' OR material = 'Grauguss'
+    """,
+    'gebaeude': """
+        SELECT g.gebaeude_id, h.gefahrenstufe
+        FROM gebaeude g
+        JOIN hochwasserzonen h ON ST_Intersects(g.geom, h.geom)
+    """,
+    'parzellen': """
+        SELECT p.parzellen_nr, b.name
+        FROM parzellen p
+        JOIN bahnhoefe b ON ST_DWithin(p.geom, b.geom, 500)
+    """,
+    'hausanschluesse': """
+        SELECT h.hausanschluss_id
+        FROM hausanschluesse h
+        JOIN werkleitungen w ON ST_DWithin(h.geom, w.geom, 5)
+    """,
+}
+
+
+class GISMaintenance:
+    def __init__(self, db_config, max_parallel=2,
+                 min_dead_tup=50, min_mod_since_analyze=50, dead_ratio=0.1):
+        self.db_config = db_config
+        self.max_parallel = max_parallel  # Gleichzeitige VACUUM-Sessions
+
+        # Schwellwerte ab wann eine Tabelle gewartet wird
+        self.min_dead_tup = min_dead_tup
+        self.min_mod_since_analyze = min_mod_since_analyze
+        self.dead_ratio = dead_ratio
+
+    def connect(self):
+        """Eigene Autocommit-Verbindung (VACUUM braucht keinen Transaktionsblock)"""
+        conn = psycopg2.connect(**self.db_config)
+        conn.autocommit = True
+        return conn
+
+    def read_table_stats(self, tables=None):
+        """Lese Wartungsstatistiken aus pg_stat_user_tables"""
+        conn = self.connect()
+        try:
+            cursor = conn.cursor()
+            # Statistik-Snapshot verwerfen, damit frische Zähler gelesen werden
+            cursor.execute("SELECT pg_stat_clear_snapshot()")
+            cursor.execute("""
+                SELECT relname, n_live_tup, n_dead_tup, n_mod_since_analyze,
+                       COALESCE(last_analyze, last_autoanalyze) IS NULL
+                FROM pg_stat_user_tables
+                WHERE schemaname = current_schema()
+                AND (%s::text[] IS NULL OR relname = ANY(%s::text[]))
+            """, (tables, tables))
+
+            stats = {}
+            for relname, live, dead, mod, nie_analysiert in cursor.fetchall():
+                stats[relname] = {
+                    'n_live_tup': live,
+                    'n_dead_tup': dead,
+                    'n_mod_since_analyze': mod,
+                    'nie_analysiert': nie_analysiert,
+                }
+            return stats
+        finally:
+            conn.close()
+
+    def plan_actions(self, stats, force_analyze=()):
+        """
+        Entscheide pro Tabelle welche Wartung nötig ist
+        - VACUUM ANALYZE bei vielen toten Tupeln
+        - ANALYZE bei vielen Änderungen seit letzter Statistik
+        - ANALYZE immer für frisch geladene Tabellen (force_analyze)
+        """
+        actions = {}
+        for table, s in stats.items():
+            dead_limit = max(self.min_dead_tup, self.dead_ratio * s['n_live_tup'])
+
+            if s['n_dead_tup'] >= dead_limit:
+                actions[table] = 'VACUUM ANALYZE'
+            elif (s['nie_analysiert']
+                  or s['n_mod_since_analyze'] >= self.min_mod_since_analyze):
+                actions[table] = 'ANALYZE'
+
+        # Statistik-Zähler laufen asynchron nach - geladene Tabellen trotzdem analysieren
+        for table in force_analyze:
+            actions.setdefault(table, 'ANALYZE')
+
+        return actions
+
+    def measure(self, cursor, table):
+        """Plankosten und Laufzeit der Testabfrage einer Tabelle messen"""
+        query = MESS_ABFRAGEN.get(table, f"SELECT COUNT(*) FROM {table}")
+
+        try:
+            cursor.execute(f"EXPLAIN (ANALYZE, FORMAT JSON) {query}")
+        except psycopg2.Error:
+            # Abhängige Tabelle fehlt - Messung überspringen
+            return None, None
+
+        plan = cursor.fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        plan = plan[0]
+        return plan['Plan']['Total Cost'], plan['Execution Time']
+
+    def maintain_table(self, table, action):
+        """Führe eine Wartungsaktion in eigener Session aus"""
+        conn = self.connect()
+        try:
+            cursor = conn.cursor()
+            kosten_vorher, laufzeit_vorher = self.measure(cursor, table)
+
+            start = time.perf_counter()
+            cursor.execute(f"{action} {table}")
+            dauer = time.perf_counter() - start
+
+            kosten_nachher, laufzeit_nachher = self.measure(cursor, table)
+
+            return {
+                'tabelle': table,
+                'aktion': action,
+                'dauer_s': dauer,
+                'kosten_vorher': kosten_vorher,
+                'kosten_nachher': kosten_nachher,
+                'laufzeit_vorher_ms': laufzeit_vorher,
+                'laufzeit_nachher_ms': laufzeit_nachher,
+            }
+        finally:
+            conn.close()
+
+    def print_result(self, result):
+        """Protokolliere Wirkung einer Wartungsaktion"""
+        print(f"  ✓ {result['aktion']} {result['tabelle']} "
+              f"({result['dauer_s']:.2f}s)")
+
+        if result['kosten_vorher'] is None or result['kosten_nachher'] is None:
+            print("    Keine Messung möglich")
+            return
+
+        print(f"    Plankosten: {result['kosten_vorher']:.1f} -> "
+              f"{result['kosten_nachher']:.1f}")
+        print(f"    Laufzeit:   {result['laufzeit_vorher_ms']:.2f}ms -> "
+              f"{result['laufzeit_nachher_ms']:.2f}ms")
+
+    def run_actions(self, actions):
+        """Führe Wartungsaktionen mit begrenzter Parallelität aus"""
+        if not actions:
+            print("✓ Keine Wartung nötig")
+            return []
+
+        results = []
+        with ThreadPoolExecutor(max_workers=self.max_parallel) as pool:
+            futures = [
+                pool.submit(self.maintain_table, table, action)
+                for table, action in sorted(actions.items())
+            ]
+            for future in futures:
+                try:
+                    result = future.result()
+                except psycopg2.Error as e:
+                    print(f"  ❌ Wartung fehlgeschlagen: {e}")
+                    continue
+                self.print_result(result)
+                results.append(result)
+
+        return results
+
+    def run_after_load(self, tables):
+        """Wartung am Ende eines Datenimports (von den Generatoren aufgerufen)"""
+        print("\n=== Wartung nach Datenimport ===")
+        stats = self.read_table_stats(list(tables))
+        actions = self.plan_actions(stats, force_analyze=[t for t in tables if t in stats])
+        return self.run_actions(actions)
+
+    def run(self):
+        """Prüfe alle Tabellen und warte die auffälligen"""
+        print("="*60)
+        print("GIS DATENBANK-WARTUNG")
+        print("="*60)
+
+        stats = self.read_table_stats()
+        for table, s in sorted(stats.items()):
+            print(f"  {table}: {s['n_live_tup']} live, {s['n_dead_tup']} tot, "
+                  f"{s['n_mod_since_analyze']} geändert seit ANALYZE")
+
+        return self.run_actions(self.plan_actions(stats))
+
+
+if __name__ == "__main__":
+    db_config = {
+        'host': os.getenv('DB_HOST', 'localhost'),
+        'database': os.getenv('DB_NAME', 'xxx'),
+        'user': os.getenv('DB_USER', 'xxx'),
+        'password': os.getenv('DB_PASSWORD', input('Passwort: '))
+    }
+
+    wartung = GISMaintenance(db_config, max_parallel=int(os.getenv('MAX_PARALLEL', 2)))
+    wartung.run()
@@ -0,0 +1,373 @@
+import psycopg2
+import io
+import os
+import time
+
+# ======================================================================
+# KRITIKALITÄT ALLER LEITUNGEN IN EINEM DURCHGANG
+# ======================================================================
+# Für jede Leitung: wie viele Haushalte/Einwohner verlieren die Versorgung,
+# wenn sie ausfällt? Statt einer rekursiven Abfrage pro Leitung (Query 3,
+# quadratisch) wird der von_knoten/zu_knoten-Graph einmal geladen und der
+# Dominatorbaum der Leitungen berechnet (Cooper-Harvey-Kennedy). Leitung p
+# dominiert Leitung d, wenn jeder Versorgungsweg von den Quellen zu d über p
+# führt - fällt p aus, ist d ohne Versorgung. Die betroffenen Haushalte von p
+# sind die Summe über ihren Teilbaum im Dominatorbaum. Vermaschte Netze und
+# Ringleitungen werden dadurch korrekt behandelt: eine Leitung mit zweitem
+# Versorgungsweg zählt bei keiner der beiden Zuleitungen.
+# Kombiniert mit Material- und Altersfaktoren aus Szenario 4 entsteht die
+# Rangliste leitungen_kritikalitaet.
+#
+# Quellen sind die Leitungen ohne Zufluss von ausserhalb ihrer starken
+# Zusammenhangskomponente (z.B. ab Reservoir, oder ein geschlossener Ring
+# ohne Einspeisung).
+
+# Sanierungskosten CHF pro Meter (Szenario 4 / Query 5)
+KOSTEN_PRO_METER = {
+    'Grauguss': 850,
+    'Asbestzement': 900,
+    'Stahl': 750,
+    'PE': 400,
+}
+KOSTEN_STANDARD = 600
+
+# Ausfallwahrscheinlichkeit je Sanierungspriorität (Szenario 4)
+PRIORITAETEN = {
+    1: ('Priorität 1: Sofortige Sanierung', 1.0),
+    2: ('Priorität 2: Mittelfristige Planung', 0.6),
+    3: ('Priorität 3: Überwachung', 0.3),
+    4: ('In Ordnung', 0.1),
+}
+
+
+def quell_leitungen(anzahl, nachfolger, vorgaenger):
+    """
+    Leitungen in Komponenten ohne Zufluss von aussen (iteratives Tarjan)
+
+    nachfolger[i] / vorgaenger[i]: Leitungen nach bzw. vor Leitung i
+    """
+    index = [-1] * anzahl
+    low = [0] * anzahl
+    auf_stack = [False] * anzahl
+    komponente = [-1] * anzahl
+    stack = []
+    zaehler = 0
+    anzahl_komponenten = 0
+
+    for start in range(anzahl):
+        if index[start] != -1:
+            continue
+
+        index[start] = low[start] = zaehler
+        zaehler += 1
+        stack.append(start)
+        auf_stack[start] = True
+        arbeit = [(start, iter(nachfolger[start]))]
+
+        while arbeit:
+            v, kanten = arbeit[-1]
+            for w in kanten:
+                if index[w] == -1:
+                    index[w] = low[w] = zaehler
+                    zaehler += 1
+                    stack.append(w)
+                    auf_stack[w] = True
+                    arbeit.append((w, iter(nachfolger[w])))
+                    break
+                if auf_stack[w]:
+                    low[v] = min(low[v], index[w])
+            else:
+                arbeit.pop()
+                if arbeit:
+                    u = arbeit[-1][0]
+                    low[u] = min(low[u], low[v])
+                if low[v] == index[v]:
+                    while True:
+                        w = stack.pop()
+                        auf_stack[w] = False
+                        komponente[w] = anzahl_komponenten
+                        if w == v:
+                            break
+                    anzahl_komponenten += 1
+
+    mit_zufluss = [False] * anzahl_komponenten
+    for j in range(anzahl):
+        for i in vorgaenger[j]:
+            if komponente[i] != komponente[j]:
+                mit_zufluss[komponente[j]] = True
+
+    return [i for i in range(anzahl) if not mit_zufluss[komponente[i]]]
+
+
+def dominatoren(anzahl, nachfolger, vorgaenger, quellen):
+    """
+    Unmittelbarer Dominator jeder Leitung (Cooper-Harvey-Kennedy)
+
+    Eine virtuelle Wurzel (Index anzahl) speist alle Quellen. Liefert idom
+    und die Postorder ab der Wurzel (jede Leitung vor ihrem Dominator).
+    """
+    wurzel = anzahl
+    ist_quelle = [False] * anzahl
+    for i in quellen:
+        ist_quelle[i] = True
+
+    # Postorder per iterativer Tiefensuche ab der Wurzel
+    besucht = [False] * (anzahl + 1)
+    besucht[wurzel] = True
+    postorder = []
+    arbeit = [(wurzel, iter(quellen))]
+    while arbeit:
+        v, kanten = arbeit[-1]
+        for w in kanten:
+            if not besucht[w]:
+                besucht[w] = True
+                arbeit.append((w, iter(nachfolger[w])))
+                break
+        else:
+            arbeit.pop()
+            postorder.append(v)
+
+    nummer = [-1] * (anzahl + 1)
+    for n, v in enumerate(postorder):
+        nummer[v] = n
+
+    idom = [-1] * (anzahl + 1)
+    idom[wurzel] = wurzel
+
+    def schnitt(a, b):
+        while a != b:
+            while nummer[a] < nummer[b]:
+                a = idom[a]
+            while nummer[b] < nummer[a]:
+                b = idom[b]
+        return a
+
+    # Iterieren in umgekehrter Postorder bis nichts mehr ändert
+    reihenfolge = postorder[-2::-1]
+    geaendert = True
+    while geaendert:
+        geaendert = False
+        for v in reihenfolge:
+            neu = wurzel if ist_quelle[v] else -1
+            for u in vorgaenger[v]:
+                if idom[u] == -1:
+                    continue
+                neu = u if neu == -1 else schnitt(u, neu)
+            if idom[v] != neu:
+                idom[v] = neu
+                geaendert = True
+
+    return idom, postorder[:-1]
+
+
+def sanierungsprioritaet(material, alter_jahre):
+    """Priorität wie in Szenario 4"""
+    if material in ('Grauguss', 'Asbestzement'):
+        return 1
+    if alter_jahre > 50:
+        return 2
+    if alter_jahre > 30:
+        return 3
+    return 4
+
+
+class NetworkCriticality:
+    def __init__(self, db_config, anschluss_distanz=5):
+        self.db_config = db_config
+        self.conn = None
+
+        # Hausanschlüsse werden der nächsten Leitung in diesem Abstand zugeordnet
+        self.anschluss_distanz = anschluss_distanz
+
+    def connect(self):
+        """Verbinde mit PostgreSQL"""
+        self.conn = psycopg2.connect(**self.db_config)
+        self.conn.autocommit = False
+        print("✓ Datenbankverbindung hergestellt")
+
+    def load_pipes(self):
+        """Alle aktiven Leitungen mit Knoten, Material, Alter und Länge laden"""
+        cursor = self.conn.cursor(name='leitungen')  # Serverseitiger Cursor
+        cursor.itersize = 50000
+        cursor.execute("""
+            SELECT
+                leitung_id,
+                von_knoten,
+                zu_knoten,
+                material,
+                COALESCE(EXTRACT(YEAR FROM AGE(CURRENT_DATE, verlegedatum)), 0),
+                ST_Length(geom)
+            FROM werkleitungen
+            WHERE status = 'aktiv'
+            AND von_knoten IS NOT NULL
+            AND zu_knoten IS NOT NULL
+        """)
+        pipes = list(cursor)
+        cursor.close()
+        return pipes
+
+    def load_households(self):
+        """Haushalte und Einwohner pro Leitung (nächste Leitung je Hausanschluss)"""
+        cursor = self.conn.cursor()
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_werkleitungen_geom
+            ON werkleitungen USING GIST(geom)
+        """)
+        cursor.execute("""
+            SELECT w.leitung_id, COUNT(*), SUM(h.einwohner)
+            FROM hausanschluesse h
+            CROSS JOIN LATERAL (
+                SELECT leitung_id
+                FROM werkleitungen l
+                WHERE l.status = 'aktiv'
+                AND ST_DWithin(l.geom, h.geom, %s)
+                ORDER BY l.geom <-> h.geom
+                LIMIT 1
+            ) w
+            GROUP BY w.leitung_id
+        """, (self.anschluss_distanz,))
+        return {leitung_id: (haushalte, einwohner or 0)
+                for leitung_id, haushalte, einwohner in cursor.fetchall()}
+
+    def subtree_sums(self, pipes, households):
+        """
+        Betroffene Haushalte/Einwohner pro Leitung (eigene + alle, die nur über sie versorgt werden)
+
+        Leitung j folgt auf Leitung i, wenn von_knoten(j) == zu_knoten(i).
+        Die Summen werden im Dominatorbaum von unten nach oben aufaddiert,
+        jede Leitung zählt also genau bei ihren Dominatoren.
+        """
+        anzahl = len(pipes)
+
+        # Knotennamen einmal auf Ganzzahlen abbilden
+        knoten = {}
+        von = [knoten.setdefault(pipe[1], len(knoten)) for pipe in pipes]
+        zu = [knoten.setdefault(pipe[2], len(knoten)) for pipe in pipes]
+
+        # Abgehende und ankommende Leitungen pro Knoten
+        abgehend = [[] for _ in range(len(knoten))]
+        ankommend = [[] for _ in range(len(knoten))]
+        for i in range(anzahl):
+            abgehend[von[i]].append(i)
+            ankommend[zu[i]].append(i)
+
+        nachfolger = [abgehend[zu[i]] for i in range(anzahl)]
+        vorgaenger = [ankommend[von[i]] for i in range(anzahl)]
+
+        quellen = quell_leitungen(anzahl, nachfolger, vorgaenger)
+        idom, postorder = dominatoren(anzahl, nachfolger, vorgaenger, quellen)
+
+        haushalte = [0] * anzahl
+        einwohner = [0] * anzahl
+        for i, pipe in enumerate(pipes):
+            haushalte[i], einwohner[i] = households.get(pipe[0], (0, 0))
+
+        # Postorder: jede Leitung vor ihrem Dominator
+        for i in postorder:
+            d = idom[i]
+            if d != anzahl:
+                haushalte[d] += haushalte[i]
+                einwohner[d] += einwohner[i]
+
+        return haushalte, einwohner
+
+    def rank(self, pipes, haushalte, einwohner):
+        """Kritikalität = betroffene Einwohner x Ausfallfaktor der Priorität"""
+        ranking = []
+        for i, (leitung_id, _, _, material, alter, laenge) in enumerate(pipes):
+            alter = int(alter)
+            prioritaet = sanierungsprioritaet(material, alter)
+            text, faktor = PRIORITAETEN[prioritaet]
+            kosten = laenge * KOSTEN_PRO_METER.get(material, KOSTEN_STANDARD)
+
+            ranking.append((
+                einwohner[i] * faktor,
+                leitung_id, material, alter, haushalte[i], einwohner[i],
+                text, round(kosten, 0),
+            ))
+
+        # Höchste Kritikalität zuerst, bei Gleichstand günstigere Sanierung zuerst
+        ranking.sort(key=lambda row: (-row[0], row[7]))
+        return ranking
+
+    def write_ranking(self, ranking):
+        """Rangliste per COPY in leitungen_kritikalitaet schreiben"""
+        cursor = self.conn.cursor()
+        cursor.execute("""
+            DROP TABLE IF EXISTS leitungen_kritikalitaet;
+            CREATE TABLE leitungen_kritikalitaet (
+                rang INTEGER PRIMARY KEY,
+                leitung_id VARCHAR(50),
+                material VARCHAR(50),
+                alter_jahre INTEGER,
+                betroffene_haushalte INTEGER,
+                betroffene_einwohner INTEGER,
+                sanierungsprioritaet VARCHAR(50),
+                geschaetzte_sanierungskosten_chf NUMERIC,
+                kritikalitaet NUMERIC
+            );
+        """)
+
+        buffer = io.StringIO()
+        for rang, row in enumerate(ranking, start=1):
+            kritikalitaet, leitung_id, material, alter, haushalte, einwohner, text, kosten = row
+            felder = [rang, leitung_id, material, alter, haushalte, einwohner,
+                      text, kosten, round(kritikalitaet, 2)]
+            buffer.write("\t".join("\\N" if f is None else str(f) for f in felder) + "\n")
+        buffer.seek(0)
+
+        cursor.copy_expert("COPY leitungen_kritikalitaet FROM STDIN", buffer)
+        cursor.execute("CREATE INDEX ON leitungen_kritikalitaet (leitung_id)")
+        self.conn.commit()
+
+    def run(self):
+        """Berechne die Kritikalität aller Leitungen"""
+        print("="*60)
+        print("KRITIKALITÄT WERKLEITUNGSNETZ")
+        print("="*60)
+
+        try:
+            self.connect()
+            start = time.perf_counter()
+
+            pipes = self.load_pipes()
+            households = self.load_households()
+            print(f"✓ {len(pipes)} Leitungen, {len(households)} versorgende Leitungen geladen "
+                  f"({time.perf_counter() - start:.1f}s)")
+
+            schritt = time.perf_counter()
+            haushalte, einwohner = self.subtree_sums(pipes, households)
+            ranking = self.rank(pipes, haushalte, einwohner)
+            print(f"✓ Teilbaum-Summen und Rangliste berechnet "
+                  f"({time.perf_counter() - schritt:.1f}s)")
+
+            schritt = time.perf_counter()
+            self.write_ranking(ranking)
+            print(f"✓ leitungen_kritikalitaet geschrieben "
+                  f"({time.perf_counter() - schritt:.1f}s)")
+
+            print("\nTop 10:")
+            for rang, row in enumerate(ranking[:10], start=1):
+                print(f"  {rang:2d}. {row[1]} ({row[2]}, {row[3]} J.) - "
+                      f"{row[5]} Einwohner, {row[6]}")
+
+            print(f"\n✓ Total {time.perf_counter() - start:.1f}s")
+
+        except Exception as e:
+            print(f"\n❌ FEHLER: {e}")
+            if self.conn:
+                self.conn.rollback()
+        finally:
+            if self.conn:
+                self.conn.close()
+
+
+if __name__ == "__main__":
+    db_config = {
+        'host': os.getenv('DB_HOST', 'localhost'),
+        'database': os.getenv('DB_NAME', 'xxx'),
+        'user': os.getenv('DB_USER', 'xxx'),
+        'password': os.getenv('DB_PASSWORD', input('Passwort: '))
+    }
+
+    NetworkCriticality(db_config).run()
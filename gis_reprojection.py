@@ -0,0 +1,171 @@
+import psycopg2
+import numpy as np
+import os
+from functools import lru_cache
+from pyproj import Transformer
+
+# ======================================================================
+# REPROJEKTION: GECACHTE GEOMETRIESPALTEN + NUMPY-BATCH-TRANSFORMATION
+# ======================================================================
+# 1. In der Datenbank: pro Ziel-SRID eine berechnete Spalte geom_<srid>
+#    (GENERATED ALWAYS ... STORED). PostgreSQL hält sie bei jedem INSERT/UPDATE
+#    aktuell, Abfragen lesen sie statt ST_Transform pro Zeile aufzurufen.
+# 2. In Python: ganze Koordinaten-Arrays mit pyproj. Transformer werden aus
+#    denselben EPSG-Codes gebaut wie ST_Transform (beide nutzen PROJ), Python
+#    und die geom_<srid>-Spalten liefern also dieselben Koordinaten.
+#
+# Transformationen mit gleichem Quell- und Ziel-SRID werden übersprungen.
+
+LV95 = 2056
+WGS84 = 4326
+WEB_MERCATOR = 3857
+
+
+# ----------------------------------------------------------------------
+# Batch-Transformationen (NumPy-Arrays über pyproj)
+# ----------------------------------------------------------------------
+
+@lru_cache(maxsize=None)
+def transformer(src_srid, dst_srid):
+    """Transformer zwischen zwei EPSG-Codes (x = Ost/Länge wie in PostGIS)"""
+    return Transformer.from_crs(f"EPSG:{src_srid}", f"EPSG:{dst_srid}", always_xy=True)
+
+
+def transform(x, y, src_srid, dst_srid):
+    """
+    Transformiere Koordinaten-Arrays zwischen zwei EPSG-Codes
+
+    Gleicher Quell- und Ziel-SRID: die Eingaben werden unverändert zurückgegeben.
+    """
+    if src_srid == dst_srid:
+        return x, y
+
+    return transformer(src_srid, dst_srid).transform(
+        np.asarray(x, dtype=np.float64), np.asarray(y, dtype=np.float64)
+    )
+
+
+def lv95_to_wgs84(e, n):
+    """LV95 (E, N) -> WGS84 (Länge, Breite) in Grad"""
+    return transform(e, n, LV95, WGS84)
+
+
+def wgs84_to_lv95(lon, lat):
+    """WGS84 (Länge, Breite) in Grad -> LV95 (E, N)"""
+    return transform(lon, lat, WGS84, LV95)
+
+
+def wgs84_to_webmercator(lon, lat):
+    """WGS84 (Länge, Breite) in Grad -> Web Mercator (x, y) in Metern"""
+    return transform(lon, lat, WGS84, WEB_MERCATOR)
+
+
+def webmercator_to_wgs84(x, y):
+    """Web Mercator (x, y) in Metern -> WGS84 (Länge, Breite) in Grad"""
+    return transform(x, y, WEB_MERCATOR, WGS84)
+
+
+def transform_coords(coords, src_srid, dst_srid):
+    """Transformiere ein (N, 2)-Array von Koordinatenpaaren"""
+    coords = np.asarray(coords, dtype=np.float64)
+    if src_srid == dst_srid:
+        return coords
+
+    x, y = transform(coords[:, 0], coords[:, 1], src_srid, dst_srid)
+    return np.column_stack((x, y))
+
+
+# ----------------------------------------------------------------------
+# Gecachte Geometriespalten (PostgreSQL)
+# ----------------------------------------------------------------------
+
+class CachedReprojection:
+    """Verwaltet berechnete geom_<srid>-Spalten pro Tabelle"""
+
+    def __init__(self, db_config):
+        self.db_config = db_config
+        self.conn = None
+
+    def connect(self):
+        """Verbinde mit PostgreSQL"""
+        self.conn = psycopg2.connect(**self.db_config)
+        self.conn.autocommit = False
+        print("✓ Datenbankverbindung hergestellt")
+
+    def geometry_info(self, table, column='geom'):
+        """Geometrietyp und SRID einer Spalte aus geometry_columns"""
+        cursor = self.conn.cursor()
+        cursor.execute("""
+            SELECT type, srid
+            FROM geometry_columns
+            WHERE f_table_schema = current_schema()
+            AND f_table_name = %s
+            AND f_geometry_column = %s
+        """, (table, column))
+        row = cursor.fetchone()
+        if row is None:
+            raise ValueError(f"Keine Geometriespalte {table}.{column}")
+        return row
+
+    def install(self, table, srids):
+        """Lege berechnete Spalten geom_<srid> mit GiST-Index an"""
+        geom_type, source_srid = self.geometry_info(table)
+        cursor = self.conn.cursor()
+        angelegt = []
+
+        for srid in srids:
+            if srid == source_srid:
+                # geom liegt bereits in diesem System - kein Cache nötig
+                continue
+
+            spalte = f"geom_{srid}"
+            cursor.execute(f"""
+                ALTER TABLE {table}
+                ADD COLUMN IF NOT EXISTS {spalte} GEOMETRY({geom_type}, {srid})
+                GENERATED ALWAYS AS (ST_Transform(geom, {srid})) STORED
+            """)
+            cursor.execute(f"""
+                CREATE INDEX IF NOT EXISTS idx_{table}_{spalte}
+                ON {table} USING GIST({spalte})
+            """)
+            angelegt.append(spalte)
+
+        self.conn.commit()
+        return angelegt
+
+    def uninstall(self, table, srids):
+        """Entferne die gecachten Spalten wieder"""
+        cursor = self.conn.cursor()
+        for srid in srids:
+            cursor.execute(f"ALTER TABLE {table} DROP COLUMN IF EXISTS geom_{srid}")
+        self.conn.commit()
+
+    def run(self, tables, srids=(WGS84, WEB_MERCATOR)):
+        """Richte Reprojektions-Cache für alle Tabellen ein"""
+        print("="*60)
+        print(f"REPROJEKTIONS-CACHE (SRID {', '.join(str(s) for s in srids)})")
+        print("="*60)
+
+        try:
+            self.connect()
+            for table in tables:
+                angelegt = self.install(table, srids)
+                print(f"✓ {table}: {', '.join(angelegt) or 'nichts zu tun'}")
+        except Exception as e:
+            print(f"\n❌ FEHLER: {e}")
+            if self.conn:
+                self.conn.rollback()
+        finally:
+            if self.conn:
+                self.conn.close()
+
+
+if __name__ == "__main__":
+    db_config = {
+        'host': os.getenv('DB_HOST', 'localhost'),
+        'database': os.getenv('DB_NAME', 'xxx'),
+        'user': os.getenv('DB_USER', 'xxx'),
+        'password': os.getenv('DB_PASSWORD', input('Passwort: '))
+    }
+
+    CachedReprojection(db_config).run(['gebaeude', 'parzellen', 'werkleitungen'])
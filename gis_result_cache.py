@@ -0,0 +1,338 @@
+import psycopg2
+from collections import OrderedDict
+import hashlib
+import json
+import os
+import pickle
+import tempfile
+import time
+
+from gis_analysis_catalog import get_analyse, resolve_parameter
+
+# ======================================================================
+# ERGEBNIS-CACHE FÜR ANALYSEN
+# ======================================================================
+# Dashboards rechnen dieselben Analysen zwischen zwei Importen immer wieder.
+# Der Cache-Schlüssel besteht aus Analyse-ID, Parametern und der Datenversion
+# jeder beteiligten Tabelle. Jede Änderung an einer Tabelle erhöht deren
+# Version - alte Einträge werden dadurch sofort unerreichbar und verdrängt.
+#
+# Datenversion:
+# - 'trigger': Statement-Trigger zählen pro Tabelle in daten_version hoch
+#              (transaktionssicher, sofort sichtbar nach COMMIT)
+# - 'stats':   Änderungszähler aus pg_stat_user_tables (ohne Trigger,
+#              aber mit Verzögerung des Statistik-Kollektors)
+#
+# Zur Version gehört in beiden Fällen auch die Struktur der Tabelle: OID
+# (DROP/CREATE), relfilenode (VACUUM FULL, CLUSTER, TRUNCATE, umschreibendes
+# ALTER TABLE) und ein Hash über Spalten und Indizes (ADD COLUMN, CREATE INDEX,
+# REINDEX). DDL ändert den Änderungszähler nicht, wohl aber z.B. Grössen- und
+# Katalogberichte.
+# Analysen mit 'version_groesse' (physische Grössen, die sich auch durch
+# Autovacuum ändern) nehmen zusätzlich pg_total_relation_size in die Version.
+
+# Struktur-Version einer Tabelle c (pg_class)
+STRUKTUR_SQL = """
+    c.oid::bigint || '/' || c.relfilenode || '/' || md5(
+        COALESCE((SELECT string_agg(a.attname || ':' || a.atttypid, ',' ORDER BY a.attnum)
+                  FROM pg_attribute a
+                  WHERE a.attrelid = c.oid AND a.attnum > 0 AND NOT a.attisdropped), '')
+        || '|' ||
+        COALESCE((SELECT string_agg(i.indexrelid || ':' || ic.relfilenode, ',' ORDER BY i.indexrelid)
+                  FROM pg_index i
+                  JOIN pg_class ic ON ic.oid = i.indexrelid
+                  WHERE i.indrelid = c.oid), '')
+    )
+"""
+
+VERSION_TRIGGER_SQL = """
+    CREATE TABLE IF NOT EXISTS daten_version (
+        tabelle VARCHAR(100) PRIMARY KEY,
+        version BIGINT NOT NULL DEFAULT 0
+    );
+
+    CREATE OR REPLACE FUNCTION gis_daten_version_erhoehen() RETURNS trigger AS $$
+    BEGIN
+        INSERT INTO daten_version (tabelle, version)
+        VALUES (TG_TABLE_NAME, 1)
+        ON CONFLICT (tabelle) DO UPDATE SET version = daten_version.version + 1;
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql;
+"""
+
+
+class AnalysisResultCache:
+    def __init__(self, db_config, max_bytes=64 * 1048576, disk_dir=None,
+                 disk_max_bytes=512 * 1048576, versionierung='trigger'):
+        self.db_config = db_config
+        self.conn = None
+
+        if versionierung not in ('trigger', 'stats'):
+            raise ValueError(f"Unbekannte Versionierung: {versionierung}")
+        self.versionierung = versionierung
+
+        # Stufe 1: LRU im Speicher (Schlüssel -> serialisiertes Ergebnis)
+        self.max_bytes = max_bytes
+        self.memory = OrderedDict()
+        self.memory_bytes = 0
+
+        # Stufe 2: optional auf Disk
+        self.disk_dir = disk_dir
+        self.disk_max_bytes = disk_max_bytes
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+
+        self.metrics = {
+            'treffer_speicher': 0,
+            'treffer_disk': 0,
+            'fehlschlaege': 0,
+            'verdraengt_speicher': 0,
+            'verdraengt_disk': 0,
+        }
+
+    def connect(self):
+        """Verbinde mit PostgreSQL"""
+        self.conn = psycopg2.connect(**self.db_config)
+        self.conn.autocommit = True
+        print("✓ Datenbankverbindung hergestellt")
+
+    def install_triggers(self, tables):
+        """Versionszähler-Trigger auf den Tabellen einrichten"""
+        cursor = self.conn.cursor()
+        cursor.execute(VERSION_TRIGGER_SQL)
+
+        for table in tables:
+            cursor.execute(f"""
+                DROP TRIGGER IF EXISTS trg_{table}_daten_version ON {table};
+                CREATE TRIGGER trg_{table}_daten_version
+                AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON {table}
+                FOR EACH STATEMENT EXECUTE FUNCTION gis_daten_version_erhoehen();
+
+                INSERT INTO daten_version (tabelle, version)
+                VALUES ('{table}', 0)
+                ON CONFLICT (tabelle) DO NOTHING;
+            """)
+        print(f"✓ Versions-Trigger auf {len(tables)} Tabellen eingerichtet")
+
+    def data_versions(self, tables, groesse=False):
+        """
+        Aktuelle Datenversion der Tabellen (sortiert nach Tabellenname)
+
+        groesse: physische Grösse inkl. Indizes und TOAST mit aufnehmen
+        """
+        cursor = self.conn.cursor()
+        tables = sorted(tables)
+        struktur = STRUKTUR_SQL
+        if groesse:
+            struktur += " || '/' || pg_total_relation_size(c.oid)"
+
+        if self.versionierung == 'trigger':
+            cursor.execute(f"""
+                SELECT c.relname,
+                       {struktur} || ':' || COALESCE(v.version, 0),
+                       EXISTS (
+                           SELECT 1 FROM pg_trigger tg
+                           WHERE tg.tgrelid = c.oid
+                           AND tg.tgname = 'trg_' || c.relname || '_daten_version'
+                       )
+                FROM pg_class c
+                LEFT JOIN daten_version v ON v.tabelle = c.relname
+                WHERE c.relnamespace = current_schema()::regnamespace
+                AND c.relkind = 'r'
+                AND c.relname = ANY(%s)
+            """, (tables,))
+            rows = cursor.fetchall()
+
+            # Trigger fehlt (Tabelle neu erstellt) -> wieder einrichten
+            ohne_trigger = [name for name, _, hat_trigger in rows if not hat_trigger]
+            if ohne_trigger:
+                self.install_triggers(ohne_trigger)
+
+            versionen = {name: version for name, version, _ in rows}
+        else:
+            cursor.execute("SELECT pg_stat_clear_snapshot()")
+            cursor.execute(f"""
+                SELECT s.relname,
+                       {struktur} || ':' || (s.n_tup_ins + s.n_tup_upd + s.n_tup_del)
+                FROM pg_stat_user_tables s
+                JOIN pg_class c ON c.oid = s.relid
+                WHERE s.schemaname = current_schema()
+                AND s.relname = ANY(%s)
+            """, (tables,))
+            versionen = dict(cursor.fetchall())
+
+        return tuple((t, versionen.get(t)) for t in tables)
+
+    def cache_key(self, analyse_id, params, versionen):
+        """Schlüssel aus Analyse-ID, Parametern und Datenversionen"""
+        payload = json.dumps(
+            {'analyse': analyse_id, 'parameter': params, 'versionen': versionen},
+            sort_keys=True, default=str
+        )
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    # ------------------------------------------------------------------
+    # Speicher-Stufe
+    # ------------------------------------------------------------------
+
+    def memory_get(self, key):
+        """Eintrag aus dem Speicher holen und als zuletzt benutzt markieren"""
+        data = self.memory.get(key)
+        if data is not None:
+            self.memory.move_to_end(key)
+        return data
+
+    def memory_put(self, key, data):
+        """Eintrag speichern und älteste Einträge bis zur Grössengrenze verdrängen"""
+        if len(data) > self.max_bytes:
+            return
+
+        if key in self.memory:
+            self.memory_bytes -= len(self.memory.pop(key))
+
+        self.memory[key] = data
+        self.memory_bytes += len(data)
+
+        while self.memory_bytes > self.max_bytes:
+            _, alt = self.memory.popitem(last=False)
+            self.memory_bytes -= len(alt)
+            self.metrics['verdraengt_speicher'] += 1
+
+    # ------------------------------------------------------------------
+    # Disk-Stufe
+    # ------------------------------------------------------------------
+
+    def disk_path(self, key):
+        return os.path.join(self.disk_dir, f"{key}.pickle")
+
+    def disk_get(self, key):
+        """Eintrag von Disk lesen (Zugriffszeit für LRU aktualisieren)"""
+        if not self.disk_dir:
+            return None
+
+        path = self.disk_path(key)
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+        except FileNotFoundError:
+            return None
+
+        os.utime(path)
+        return data
+
+    def disk_put(self, key, data):
+        """Eintrag auf Disk schreiben und älteste Dateien verdrängen"""
+        if not self.disk_dir or len(data) > self.disk_max_bytes:
+            return
+
+        # Atomar schreiben, damit parallele Leser keine halben Dateien sehen
+        path = self.disk_path(key)
+        with tempfile.NamedTemporaryFile(dir=self.disk_dir, suffix='.tmp',
+                                         delete=False) as f:
+            f.write(data)
+        os.replace(f.name, path)
+
+        eintraege = []
+        for name in os.listdir(self.disk_dir):
+            if name.endswith('.pickle'):
+                stat = os.stat(os.path.join(self.disk_dir, name))
+                eintraege.append((stat.st_mtime, stat.st_size, name))
+
+        total = sum(size for _, size, _ in eintraege)
+        for _, size, name in sorted(eintraege):
+            if total <= self.disk_max_bytes:
+                break
+            try:
+                os.remove(os.path.join(self.disk_dir, name))
+            except FileNotFoundError:
+                pass
+            total -= size
+            self.metrics['verdraengt_disk'] += 1
+
+    # ------------------------------------------------------------------
+    # Analysen ausführen
+    # ------------------------------------------------------------------
+
+    def execute_query(self, sql, params):
+        """Analyse auf der Datenbank ausführen"""
+        cursor = self.conn.cursor()
+        cursor.execute(sql, params)
+        columns = [desc[0] for desc in cursor.description]
+        return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+    def run(self, analyse_id, params=None):
+        """Analyse aus dem Cache liefern oder ausführen und speichern"""
+        analyse = get_analyse(analyse_id)
+        params = resolve_parameter(analyse, params)
+
+        versionen = self.data_versions(analyse['tabellen'],
+                                       groesse=analyse.get('version_groesse', False))
+        key = self.cache_key(analyse_id, params, versionen)
+
+        data = self.memory_get(key)
+        if data is not None:
+            self.metrics['treffer_speicher'] += 1
+            return pickle.loads(data)
+
+        data = self.disk_get(key)
+        if data is not None:
+            self.metrics['treffer_disk'] += 1
+            self.memory_put(key, data)
+            return pickle.loads(data)
+
+        self.metrics['fehlschlaege'] += 1
+        rows = self.execute_query(analyse['sql'], params)
+
+        data = pickle.dumps(rows, protocol=pickle.HIGHEST_PROTOCOL)
+        self.memory_put(key, data)
+        self.disk_put(key, data)
+        return rows
+
+    def hit_rate(self):
+        """Trefferquote über beide Stufen"""
+        treffer = self.metrics['treffer_speicher'] + self.metrics['treffer_disk']
+        total = treffer + self.metrics['fehlschlaege']
+        return treffer / total if total else 0.0
+
+    def print_metrics(self):
+        """Cache-Kennzahlen ausgeben"""
+        print("\n=== Cache-Statistik ===")
+        for name, wert in self.metrics.items():
+            print(f"  {name}: {wert}")
+        print(f"  speicher_belegt: {self.memory_bytes / 1024:.1f} kB "
+              f"({len(self.memory)} Einträge)")
+        print(f"  trefferquote: {self.hit_rate() * 100:.1f}%")
+
+    def close(self):
+        if self.conn:
+            self.conn.close()
+
+
+if __name__ == "__main__":
+    db_config = {
+        'host': os.getenv('DB_HOST', 'localhost'),
+        'database': os.getenv('DB_NAME', 'xxx'),
+        'user': os.getenv('DB_USER', 'xxx'),
+        'password': os.getenv('DB_PASSWORD', input('Passwort: '))
+    }
+
+    cache = AnalysisResultCache(db_config, disk_dir=os.getenv('GIS_CACHE_DIR'))
+    dashboard = ['quartier_verdichtung', 'nutzungszonen', 'groessenbericht']
+
+    try:
+        cache.connect()
+        tabellen = sorted({t for a in dashboard for t in get_analyse(a)['tabellen']})
+        cache.install_triggers(tabellen)
+
+        # Dashboard mehrmals laden: erster Durchlauf rechnet, danach Cache-Treffer
+        for durchlauf in range(3):
+            start = time.perf_counter()
+            for analyse_id in dashboard:
+                cache.run(analyse_id)
+            print(f"  Durchlauf {durchlauf + 1}: "
+                  f"{(time.perf_counter() - start) * 1000:.1f}ms")
+
+        cache.print_metrics()
+    finally:
+        cache.close()
@@ -0,0 +1,304 @@
+import psycopg2
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal, ROUND_HALF_UP
+from itertools import islice
+import heapq
+import os
+
+from generate_advanced_gis_data import GISDummyDataGenerator
+from gis_analysis_catalog import get_analyse, resolve_parameter
+
+# ======================================================================
+# MEHRERE GEMEINDEN: SHARDS PRO SCHEMA ODER INSTANZ + SCATTER-GATHER
+# ======================================================================
+# Jede Gemeinde bekommt ein eigenes Schema (gemeinde_01, ...) in derselben
+# Datenbank oder eine eigene PostgreSQL-Instanz. Katalog-Analysen laufen
+# parallel auf allen Shards, die Ergebnisse werden in Python zusammengeführt
+# (ORDER BY/LIMIT-Merge bzw. Re-Aggregation von SUM/COUNT/AVG).
+
+# Abstand zwischen den Gemeinde-Zentren (LV95, Meter)
+GEMEINDE_ABSTAND = 15000
+
+
+def schema_shards(db_config, anzahl):
+    """N Gemeinden als Schemas in einer Datenbank"""
+    shards = []
+    for i in range(anzahl):
+        schema = f"gemeinde_{i+1:02d}"
+        shards.append({
+            'name': f"Gemeinde {i+1:02d}",
+            'schema': schema,
+            # search_path gilt für alle Verbindungen dieses Shards (auch Wartung)
+            'db_config': {**db_config, 'options': f"-c search_path={schema},public"},
+        })
+    return shards
+
+
+def instanz_shards(dsns):
+    """Eine Gemeinde pro PostgreSQL-Instanz (libpq-Verbindungsstrings)"""
+    return [
+        {'name': f"Gemeinde {i+1:02d}", 'schema': None, 'db_config': {'dsn': dsn}}
+        for i, dsn in enumerate(dsns)
+    ]
+
+
+class GemeindeShardGenerator(GISDummyDataGenerator):
+    """Dummy-Daten für eine einzelne Gemeinde in ihrem eigenen Shard"""
+
+    def __init__(self, shard, index, grid_size=None):
+        # Reproduzierbare Daten pro Gemeinde
+        super().__init__(shard['db_config'], grid_size=grid_size, seed=index)
+        self.schema = shard['schema']
+        self.gemeinde_name = shard['name']
+
+        # Gemeinden im Raster nebeneinander, ausgehend von Zürich
+        self.zurich_x += (index % 5) * GEMEINDE_ABSTAND
+        self.zurich_y += (index // 5) * GEMEINDE_ABSTAND
+
+    def create_tables(self):
+        """Schema und werkleitungen-Basistabelle anlegen, dann Standard-Tabellen"""
+        cursor = self.conn.cursor()
+
+        if self.schema:
+            cursor.execute(f"""
+                DROP SCHEMA IF EXISTS {self.schema} CASCADE;
+                CREATE SCHEMA {self.schema};
+            """)
+            # Platzhalter, damit DROP TABLE im Basis-Generator nicht auf public.* greift
+            for table in self.TABELLEN:
+                if table != 'werkleitungen':
+                    cursor.execute(f"CREATE TABLE {self.schema}.{table} ()")
+
+        # Der Basis-Generator setzt eine bestehende werkleitungen-Tabelle voraus
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS werkleitungen (
+                id SERIAL PRIMARY KEY,
+                leitung_id VARCHAR(50),
+                material VARCHAR(50),
+                durchmesser INTEGER,
+                verlegedatum DATE,
+                bemerkung TEXT,
+                geom GEOMETRY(LineString, 2056),
+                import_datum TIMESTAMP
+            );
+            CREATE INDEX IF NOT EXISTS idx_werkleitungen_geom
+            ON werkleitungen USING GIST(geom);
+        """)
+
+        super().create_tables()
+
+
+class ShardedGISDeployment:
+    """Erzeugt N Gemeinden, je eine pro Shard"""
+
+    def __init__(self, shards, grid_size=None):
+        self.shards = shards
+        self.grid_size = grid_size
+
+    def run(self):
+        """Generiere alle Gemeinden nacheinander"""
+        print("="*60)
+        print(f"MULTI-GEMEINDE GENERATOR ({len(self.shards)} Shards)")
+        print("="*60)
+
+        for index, shard in enumerate(self.shards):
+            ziel = shard['schema'] or shard['db_config'].get('dsn')
+            print(f"\n### {shard['name']} -> {ziel} ###")
+            GemeindeShardGenerator(shard, index, grid_size=self.grid_size).run()
+
+
+class _Sortierschluessel:
+    """Sortierschlüssel mit gemischter Richtung und PostgreSQL-NULL-Verhalten"""
+
+    def __init__(self, werte, absteigend):
+        self.werte = werte
+        self.absteigend = absteigend
+
+    def __lt__(self, other):
+        for a, b, desc in zip(self.werte, other.werte, self.absteigend):
+            if a == b:
+                continue
+            # PostgreSQL: ASC -> NULLS LAST, DESC -> NULLS FIRST
+            if a is None:
+                return desc
+            if b is None:
+                return not desc
+            return a > b if desc else a < b
+        return False
+
+
+class ScatterGatherExecutor:
+    """Führt Katalog-Analysen parallel auf allen Shards aus und führt sie zusammen"""
+
+    def __init__(self, shards, max_parallel=None):
+        self.shards = shards
+        self.max_parallel = max_parallel or len(shards)
+
+    def query_shard(self, shard, sql, params):
+        """Abfrage auf einem Shard ausführen"""
+        conn = psycopg2.connect(**shard['db_config'])
+        try:
+            cursor = conn.cursor()
+            cursor.execute(sql, params)
+            columns = [desc[0] for desc in cursor.description]
+            rows = [dict(zip(columns, row)) for row in cursor.fetchall()]
+            return columns, rows
+        finally:
+            conn.close()
+
+    def scatter(self, sql, params):
+        """Abfrage parallel an alle Shards verteilen"""
+        with ThreadPoolExecutor(max_workers=self.max_parallel) as pool:
+            futures = [
+                pool.submit(self.query_shard, shard, sql, params)
+                for shard in self.shards
+            ]
+            return [future.result() for future in futures]
+
+    def sort_key(self, sortierung):
+        """Schlüsselfunktion für eine Sortierliste [(spalte, absteigend)]"""
+        spalten = [spalte for spalte, _ in sortierung]
+        richtungen = [desc for _, desc in sortierung]
+        return lambda row: _Sortierschluessel([row[s] for s in spalten], richtungen)
+
+    def merge_sorted(self, teilergebnisse, merge, limit):
+        """k-Wege-Merge der bereits sortierten Shard-Ergebnisse"""
+        sortierung = merge.get('sortierung')
+        if sortierung:
+            rows = heapq.merge(*teilergebnisse, key=self.sort_key(sortierung))
+        else:
+            rows = (row for teil in teilergebnisse for row in teil)
+
+        if limit is not None:
+            rows = islice(rows, limit)
+        return list(rows)
+
+    @staticmethod
+    def combine(rows, funktion):
+        """Quotient aus Teilsummen bzw. Anzahl verschiedener Schlüssel"""
+        if funktion[0] == 'quotient':
+            _, zaehler, nenner, stellen = funktion
+            werte = [r[zaehler] for r in rows if r[zaehler] is not None]
+            if isinstance(nenner, str):
+                teiler = sum(r[nenner] or 0 for r in rows)
+            else:
+                teiler = nenner
+            if not werte or not teiler:
+                return None
+
+            # Wie ROUND(numeric, stellen) in PostgreSQL: halbe Stellen weg von 0
+            quotient = sum(Decimal(str(v)) for v in werte) / Decimal(str(teiler))
+            return quotient.quantize(Decimal(1).scaleb(-stellen), rounding=ROUND_HALF_UP)
+
+        if funktion[0] == 'distinct':
+            schluessel = set()
+            for r in rows:
+                schluessel.update(r[funktion[1]] or [])
+            return len(schluessel)
+
+        raise ValueError(f"Unbekannte Aggregation: {funktion}")
+
+    def reaggregate(self, teilergebnisse, merge):
+        """SUM/COUNT/MIN/MAX/AVG der Shards zu einem Gesamtergebnis verrechnen"""
+        gruppierung = merge.get('gruppierung', [])
+        aggregate = merge['aggregate']
+        gruppen = {}
+
+        for teil in teilergebnisse:
+            for row in teil:
+                schluessel = tuple(row[s] for s in gruppierung)
+                gruppe = gruppen.setdefault(schluessel, [])
+                gruppe.append(row)
+
+        ergebnis = []
+        for schluessel, rows in gruppen.items():
+            zeile = dict(zip(gruppierung, schluessel))
+
+            for spalte, funktion in aggregate.items():
+                if isinstance(funktion, tuple):
+                    zeile[spalte] = self.combine(rows, funktion)
+                    continue
+
+                werte = [r[spalte] for r in rows if r[spalte] is not None]
+                if not werte:
+                    zeile[spalte] = 0 if funktion in ('sum', 'count') else None
+                elif funktion in ('sum', 'count'):
+                    # COUNT der Shards wird summiert
+                    zeile[spalte] = sum(werte)
+                elif funktion == 'min':
+                    zeile[spalte] = min(werte)
+                elif funktion == 'max':
+                    zeile[spalte] = max(werte)
+                else:
+                    raise ValueError(f"Unbekannte Aggregation: {funktion}")
+
+            ergebnis.append(zeile)
+
+        # Prozentanteile am neuen Gesamttotal
+        for spalte, basis in merge.get('anteil', {}).items():
+            gesamt = sum(zeile[basis] or 0 for zeile in ergebnis)
+            for zeile in ergebnis:
+                # Wie ROUND(numeric, 1): halbe Stellen weg von 0
+                zeile[spalte] = ((Decimal(100) * zeile[basis] / gesamt)
+                                 .quantize(Decimal('0.1'), rounding=ROUND_HALF_UP)
+                                 if gesamt else None)
+
+        if merge.get('sortierung'):
+            ergebnis.sort(key=self.sort_key(merge['sortierung']))
+        return ergebnis
+
+    def execute(self, analyse_id, params=None):
+        """Katalog-Analyse auf allen Shards ausführen und zusammenführen"""
+        analyse = get_analyse(analyse_id)
+        params = resolve_parameter(analyse, params)
+        merge = analyse['merge']
+
+        antworten = self.scatter(analyse.get('shard_sql', analyse['sql']), params)
+
+        if 'aggregate' in merge:
+            return self.reaggregate([rows for _, rows in antworten], merge)
+
+        # Ohne Aggregation: Zeilen mit Gemeinde kennzeichnen und mergen
+        teilergebnisse = []
+        for shard, (_, rows) in zip(self.shards, antworten):
+            teilergebnisse.append([{'gemeinde': shard['name'], **row} for row in rows])
+
+        limit = params.get(merge['limit']) if merge.get('limit') else None
+        return self.merge_sorted(teilergebnisse, merge, limit)
+
+
+def print_rows(rows):
+    """Ergebnis als einfache Tabelle ausgeben"""
+    if not rows:
+        print("  (keine Zeilen)")
+        return
+
+    columns = list(rows[0].keys())
+    print("  " + " | ".join(columns))
+    for row in rows:
+        print("  " + " | ".join(str(row[c]) for c in columns))
+
+
+if __name__ == "__main__":
+    db_config = {
+        'host': os.getenv('DB_HOST', 'localhost'),
+        'database': os.getenv('DB_NAME', 'xxx'),
+        'user': os.getenv('DB_USER', 'xxx'),
+        'password': os.getenv('DB_PASSWORD', input('Passwort: '))
+    }
+
+    # SHARD_DSNS="host=a dbname=g1;host=b dbname=g2" -> eine Instanz pro Gemeinde
+    # sonst SHARD_ANZAHL Schemas in der konfigurierten Datenbank
+    dsns = os.getenv('SHARD_DSNS')
+    if dsns:
+        shards = instanz_shards([d.strip() for d in dsns.split(';') if d.strip()])
+    else:
+        shards = schema_shards(db_config, int(os.getenv('SHARD_ANZAHL', 3)))
+
+    if os.getenv('SHARD_GENERIEREN', '1') == '1':
+        ShardedGISDeployment(shards).run()
+
+    executor = ScatterGatherExecutor(shards)
+    for analyse_id in ('nutzungszonen', 'gebaeude_volumen', 'systembericht'):
+        print(f"\n=== {get_analyse(analyse_id)['titel']} ===")
+        print_rows(executor.execute(analyse_id))
@@ -0,0 +1,148 @@
+import psycopg2
+import math
+import os
+
+# ======================================================================
+# SPEICHER-KOMPAKTIERUNG: KOORDINATEN AUF RASTER REDUZIEREN
+# ======================================================================
+# LV95-Vermessungsdaten brauchen Millimeter-Präzision, nicht 15 Stellen.
+# Rastet bestehende Geometrien mit ST_SnapToGrid oder ST_QuantizeCoordinates
+# ein, schreibt die Tabellen neu und vergleicht Tabellen-, TOAST- und
+# Indexgrössen vorher/nachher.
+
+GEOMETRIE_TABELLEN = ['gemeindegrenzen', 'quartiere', 'gebaeude', 'hochwasserzonen',
+                      'parzellen', 'bahnhoefe', 'hausanschluesse', 'werkleitungen']
+
+
+class GISStorageCompaction:
+    def __init__(self, db_config, grid_size=0.001, methode='snap'):
+        self.db_config = db_config
+        self.conn = None
+
+        # Raster in Metern (0.001 = Millimeter)
+        self.grid_size = grid_size
+
+        # 'snap' = ST_SnapToGrid, 'quantize' = ST_QuantizeCoordinates
+        if methode not in ('snap', 'quantize'):
+            raise ValueError(f"Unbekannte Methode: {methode}")
+        self.methode = methode
+
+        # ST_QuantizeCoordinates kennt nur Nachkommastellen, also Zehnerpotenzen
+        if methode == 'quantize' and 10 ** round(math.log10(grid_size)) != grid_size:
+            raise ValueError(f"quantize braucht ein Raster als Zehnerpotenz, nicht {grid_size}")
+
+    def connect(self):
+        """Verbinde mit PostgreSQL (Autocommit wegen VACUUM FULL)"""
+        self.conn = psycopg2.connect(**self.db_config)
+        self.conn.autocommit = True
+        print("✓ Datenbankverbindung hergestellt")
+
+    def existing_tables(self, tables):
+        """Nur Tabellen berücksichtigen die eine geom-Spalte haben"""
+        cursor = self.conn.cursor()
+        cursor.execute("""
+            SELECT table_name
+            FROM information_schema.columns
+            WHERE table_schema = ANY(current_schemas(false))
+            AND column_name = 'geom'
+            AND table_name = ANY(%s)
+        """, (list(tables),))
+        vorhanden = {row[0] for row in cursor.fetchall()}
+        return [t for t in tables if t in vorhanden]
+
+    def table_sizes(self, table):
+        """Grösse von Tabelle, TOAST und Indizes in Bytes"""
+        cursor = self.conn.cursor()
+        cursor.execute("""
+            SELECT
+                pg_relation_size(c.oid),
+                COALESCE(pg_total_relation_size(NULLIF(c.reltoastrelid, 0)), 0),
+                pg_indexes_size(c.oid)
+            FROM pg_class c
+            WHERE c.oid = %s::regclass
+        """, (table,))
+        tabelle, toast, indizes = cursor.fetchone()
+        return {'tabelle': tabelle, 'toast': toast, 'indizes': indizes}
+
+    def compact_expression(self):
+        """SQL-Ausdruck der eine Geometrie auf das Raster reduziert"""
+        if self.methode == 'snap':
+            return f"ST_SnapToGrid(geom, {self.grid_size})"
+
+        # ST_QuantizeCoordinates erwartet Anzahl Nachkommastellen
+        digits = max(0, -round(math.log10(self.grid_size)))
+        return f"ST_QuantizeCoordinates(geom, {digits})"
+
+    def compact_table(self, table):
+        """Geometrien einer Tabelle einrasten und Tabelle neu schreiben"""
+        cursor = self.conn.cursor()
+        expression = self.compact_expression()
+
+        # Nur Zeilen die sich ändern; kollabierte Geometrien bleiben unverändert
+        cursor.execute(f"""
+            UPDATE {table}
+            SET geom = {expression}
+            WHERE geom IS NOT NULL
+            AND NOT ST_IsEmpty({expression})
+            AND NOT ST_OrderingEquals(geom, {expression})
+        """)
+        geaendert = cursor.rowcount
+
+        # VACUUM FULL schreibt Tabelle, TOAST und Indizes kompakt neu
+        cursor.execute(f"VACUUM FULL ANALYZE {table}")
+        return geaendert
+
+    def print_sizes(self, table, vorher, nachher, geaendert):
+        """Vergleich der Grössen ausgeben"""
+        print(f"\n  {table} ({geaendert} Geometrien eingerastet)")
+        for teil in ('tabelle', 'toast', 'indizes'):
+            a = vorher[teil] / 1024
+            b = nachher[teil] / 1024
+            prozent = (b - a) / a * 100 if a else 0
+            print(f"    {teil:8s} {a:10.1f} kB -> {b:10.1f} kB ({prozent:+.1f}%)")
+
+    def run(self, tables=GEOMETRIE_TABELLEN):
+        """Kompaktiere alle Geometrietabellen"""
+        print("="*60)
+        print(f"SPEICHER-KOMPAKTIERUNG ({self.methode}, Raster {self.grid_size}m)")
+        print("="*60)
+
+        try:
+            self.connect()
+            total_vorher = total_nachher = 0
+
+            for table in self.existing_tables(tables):
+                vorher = self.table_sizes(table)
+                geaendert = self.compact_table(table)
+                nachher = self.table_sizes(table)
+
+                self.print_sizes(table, vorher, nachher, geaendert)
+                total_vorher += sum(vorher.values())
+                total_nachher += sum(nachher.values())
+
+            print("\n" + "="*60)
+            print(f"✓ Total: {total_vorher / 1048576:.2f} MB -> "
+                  f"{total_nachher / 1048576:.2f} MB")
+            print("="*60)
+
+        except Exception as e:
+            print(f"\n❌ FEHLER: {e}")
+        finally:
+            if self.conn:
+                self.conn.close()
+
+
+if __name__ == "__main__":
+    db_config = {
+        'host': os.getenv('DB_HOST', 'localhost'),
+        'database': os.getenv('DB_NAME', 'xxx'),
+        'user': os.getenv('DB_USER', 'xxx'),
+        'password': os.getenv('DB_PASSWORD', input('Passwort: '))
+    }
+
+    kompaktierung = GISStorageCompaction(
+        db_config,
+        grid_size=float(os.getenv('GIS_GRID_SIZE', 0.001)),
+        methode=os.getenv('GIS_COMPACTION', 'snap')
+    )
+    kompaktierung.run()
@@ -0,0 +1,82 @@
+import math
+import os
+
+import pytest
+
+psycopg2 = pytest.importorskip('psycopg2')
+np = pytest.importorskip('numpy')
+
+from gis_grid_aggregation import RASTER_SQL, URSPRUNG_X, URSPRUNG_Y, hex_cells
+
+# Punkte auf Zellgrenzen (Ecken und Kantenmitten) rund um Winterthur: Python
+# (Neuaufbau) und SQL (Trigger) müssen sie derselben Zelle zuordnen
+
+AUFLOESUNGEN = [50, 100, 250, 500, 0.5, 7.3]
+
+
+def grenzpunkte(groesse, radius=3):
+    mitte_q, mitte_r = hex_cells([2697000.0], [1262000.0], groesse)
+    xs, ys = [], []
+    for dq in range(-radius, radius + 1):
+        for dr in range(-radius, radius + 1):
+            q, r = int(mitte_q[0]) + dq, int(mitte_r[0]) + dr
+            cx = URSPRUNG_X + groesse * (math.sqrt(3.0) * q + math.sqrt(3.0) / 2.0 * r)
+            cy = URSPRUNG_Y + groesse * 1.5 * r
+            for i in range(6):
+                # Ecke
+                winkel = math.radians(60 * i - 30)
+                xs.append(cx + groesse * math.cos(winkel))
+                ys.append(cy + groesse * math.sin(winkel))
+                # Kantenmitte
+                winkel = math.radians(60 * i)
+                xs.append(cx + groesse * math.sqrt(3.0) / 2.0 * math.cos(winkel))
+                ys.append(cy + groesse * math.sqrt(3.0) / 2.0 * math.sin(winkel))
+    return xs, ys
+
+
+@pytest.mark.parametrize('groesse', AUFLOESUNGEN)
+def test_grenzpunkte_in_nachbarzelle(groesse):
+    xs, ys = grenzpunkte(groesse, radius=0)
+    mitte_q, mitte_r = hex_cells([2697000.0], [1262000.0], groesse)
+    q, r = hex_cells(xs, ys, groesse)
+
+    # Hexagon-Abstand zur Mittelzelle höchstens 1
+    dq, dr = q - mitte_q[0], r - mitte_r[0]
+    abstand = (np.abs(dq) + np.abs(dr) + np.abs(dq + dr)) // 2
+    assert abstand.max() <= 1
+
+
+@pytest.fixture
+def conn():
+    if not os.getenv('DB_NAME'):
+        pytest.skip('Keine Testdatenbank (DB_NAME)')
+
+    conn = psycopg2.connect(
+        host=os.getenv('DB_HOST', 'localhost'),
+        database=os.getenv('DB_NAME'),
+        user=os.getenv('DB_USER'),
+        password=os.getenv('DB_PASSWORD'),
+    )
+    try:
+        # Funktionen nur in dieser Transaktion anlegen
+        conn.cursor().execute(RASTER_SQL)
+        yield conn
+    finally:
+        conn.rollback()
+        conn.close()
+
+
+@pytest.mark.parametrize('groesse', AUFLOESUNGEN)
+def test_python_und_sql_gleiche_zelle(conn, groesse):
+    xs, ys = grenzpunkte(groesse)
+    cursor = conn.cursor()
+    cursor.execute("""
+        SELECT z.q, z.r
+        FROM unnest(%s::float8[], %s::float8[]) WITH ORDINALITY AS p(x, y, i)
+        CROSS JOIN LATERAL gis_hex_zelle(p.x, p.y, %s) z
+        ORDER BY p.i
+    """, (xs, ys, groesse))
+    sql_zellen = cursor.fetchall()
+
+    q, r = hex_cells(xs, ys, groesse)
+    assert sql_zellen == list(zip(q.tolist(), r.tolist()))
@@ -0,0 +1,91 @@
+import pytest
+
+pytest.importorskip('psycopg2')
+
+from gis_network_criticality import NetworkCriticality
+
+# Betroffene Haushalte/Einwohner ohne Datenbank: Leitungen als
+# (leitung_id, von_knoten, zu_knoten, material, alter, laenge)
+
+
+def leitung(leitung_id, von, zu):
+    return (leitung_id, von, zu, 'PE', 10, 100.0)
+
+
+def summen(pipes, households):
+    haushalte, einwohner = NetworkCriticality({}).subtree_sums(pipes, households)
+    return {pipe[0]: (haushalte[i], einwohner[i]) for i, pipe in enumerate(pipes)}
+
+
+def test_kette():
+    pipes = [leitung('L1', 'Q', 'A'), leitung('L2', 'A', 'B'), leitung('L3', 'B', 'C')]
+    households = {'L2': (1, 2), 'L3': (2, 5)}
+
+    assert summen(pipes, households) == {
+        'L1': (3, 7),
+        'L2': (3, 7),
+        'L3': (2, 5),
+    }
+
+
+def test_raute():
+    # Q -> A verzweigt nach B und C, beide führen nach D
+    pipes = [
+        leitung('L1', 'Q', 'A'),
+        leitung('L2', 'A', 'B'),
+        leitung('L3', 'A', 'C'),
+        leitung('L4', 'B', 'D'),
+        leitung('L5', 'C', 'D'),
+        leitung('L6', 'D', 'E'),
+    ]
+    households = {'L4': (1, 3), 'L6': (1, 4)}
+
+    assert summen(pipes, households) == {
+        'L1': (2, 7),
+        'L2': (1, 3),  # L4 hängt nur an L2, L6 hat einen zweiten Weg
+        'L3': (0, 0),
+        'L4': (1, 3),
+        'L5': (0, 0),
+        'L6': (1, 4),
+    }
+
+
+def test_ring():
+    # Q -> A -> B -> C -> A (Ring), Stich C -> D
+    pipes = [
+        leitung('L1', 'Q', 'A'),
+        leitung('L2', 'A', 'B'),
+        leitung('L3', 'B', 'C'),
+        leitung('L4', 'C', 'A'),
+        leitung('L5', 'C', 'D'),
+    ]
+    households = {'L4': (1, 1), 'L5': (1, 4)}
+
+    assert summen(pipes, households) == {
+        'L1': (2, 5),
+        'L2': (2, 5),
+        'L3': (2, 5),
+        'L4': (1, 1),
+        'L5': (1, 4),
+    }
+
+
+def test_ring_ohne_einspeisung():
+    pipes = [leitung('L1', 'A', 'B'), leitung('L2', 'B', 'A')]
+    households = {'L1': (1, 2), 'L2': (1, 3)}
+
+    assert summen(pipes, households) == {'L1': (1, 2), 'L2': (1, 3)}
+
+
+def test_vermascht_ohne_mehrfachzaehlung():
+    # 20 Ebenen mit je zwei parallelen Leitungen, ein Haushalt am Ende
+    pipes = [leitung('L_TOP', 'Q', 'K0')]
+    for ebene in range(20):
+        for seite in ('a', 'b'):
+            pipes.append(leitung(f"L_{ebene}{seite}", f"K{ebene}", f"K{ebene + 1}"))
+    pipes.append(leitung('L_END', 'K20', 'H'))
+    households = {'L_END': (1, 4)}
+
+    ergebnis = summen(pipes, households)
+    assert ergebnis['L_TOP'] == (1, 4)
+    assert ergebnis['L_0a'] == (0, 0)
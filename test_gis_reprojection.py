@@ -0,0 +1,70 @@
+import os
+
+import pytest
+
+psycopg2 = pytest.importorskip('psycopg2')
+np = pytest.importorskip('numpy')
+pytest.importorskip('pyproj')
+
+from gis_reprojection import LV95, WGS84, WEB_MERCATOR, transform, transform_coords
+
+# Punkte im Kanton Zürich (LV95)
+PUNKTE = np.array([
+    [2600000.0, 1200000.0],
+    [2697000.0, 1262000.0],
+    [2683000.25, 1247999.75],
+    [2750000.0, 1290000.0],
+])
+
+
+def test_gleiches_srid_unveraendert():
+    np.testing.assert_array_equal(transform_coords(PUNKTE, LV95, LV95), PUNKTE)
+
+
+@pytest.mark.parametrize('ziel', [WGS84, WEB_MERCATOR])
+def test_hin_und_zurueck_unter_1cm(ziel):
+    x, y = transform(PUNKTE[:, 0], PUNKTE[:, 1], LV95, ziel)
+    e, n = transform(x, y, ziel, LV95)
+
+    assert np.max(np.hypot(e - PUNKTE[:, 0], n - PUNKTE[:, 1])) < 0.01
+
+
+def test_bern_fundamentalpunkt():
+    # Alte Sternwarte Bern in WGS84 (auf ~1m)
+    lon, lat = transform([2600000.0], [1200000.0], LV95, WGS84)
+
+    assert lon[0] == pytest.approx(7.43863, abs=1e-5)
+    assert lat[0] == pytest.approx(46.95108, abs=1e-5)
+
+
+@pytest.fixture
+def conn():
+    if not os.getenv('DB_NAME'):
+        pytest.skip('Keine Testdatenbank (DB_NAME)')
+
+    conn = psycopg2.connect(
+        host=os.getenv('DB_HOST', 'localhost'),
+        database=os.getenv('DB_NAME'),
+        user=os.getenv('DB_USER'),
+        password=os.getenv('DB_PASSWORD'),
+    )
+    yield conn
+    conn.close()
+
+
+@pytest.mark.parametrize('ziel, toleranz', [(WGS84, 1e-8), (WEB_MERCATOR, 0.001)])
+def test_gleich_wie_st_transform(conn, ziel, toleranz):
+    # Python-Transformation und geom_<srid>-Spalten liefern dieselben Koordinaten
+    cursor = conn.cursor()
+    cursor.execute("""
+        SELECT ST_X(t.geom), ST_Y(t.geom)
+        FROM unnest(%s::float8[], %s::float8[]) WITH ORDINALITY AS p(x, y, i)
+        CROSS JOIN LATERAL (
+            SELECT ST_Transform(ST_SetSRID(ST_MakePoint(p.x, p.y), %s), %s) AS geom
+        ) t
+        ORDER BY p.i
+    """, (PUNKTE[:, 0].tolist(), PUNKTE[:, 1].tolist(), LV95, ziel))
+    postgis = np.array(cursor.fetchall())
+
+    x, y = transform(PUNKTE[:, 0], PUNKTE[:, 1], LV95, ziel)
+    np.testing.assert_allclose(np.column_stack((x, y)), postgis, rtol=0, atol=toleranz)
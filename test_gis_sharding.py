@@ -0,0 +1,38 @@
+import pytest
+
+pytest.importorskip('psycopg2')
+
+from decimal import Decimal
+
+from gis_sharding import ScatterGatherExecutor
+
+# Re-Aggregation ohne Datenbank: Teilergebnisse zweier Shards wie von
+# RealDictCursor geliefert
+
+
+def test_anteil_rundet_wie_postgresql():
+    # 5 von 80 Parzellen = 6.25 % -> ROUND(6.25, 1) = 6.3 (nicht 6.2)
+    merge = {
+        'gruppierung': ['zonentyp'],
+        'aggregate': {'anzahl_parzellen': 'count'},
+        'anteil': {'anteil_prozent': 'anzahl_parzellen'},
+    }
+    teilergebnisse = [
+        [{'zonentyp': 'Wohnzone', 'anzahl_parzellen': 3},
+         {'zonentyp': 'Gewerbezone', 'anzahl_parzellen': 40}],
+        [{'zonentyp': 'Wohnzone', 'anzahl_parzellen': 2},
+         {'zonentyp': 'Gewerbezone', 'anzahl_parzellen': 35}],
+    ]
+
+    ergebnis = ScatterGatherExecutor([]).reaggregate(teilergebnisse, merge)
+    anteile = {zeile['zonentyp']: zeile['anteil_prozent'] for zeile in ergebnis}
+
+    assert anteile == {'Wohnzone': Decimal('6.3'), 'Gewerbezone': Decimal('93.8')}
+
+
+def test_quotient_rundet_wie_postgresql():
+    rows = [{'summe': 1, 'anzahl': 4}, {'summe': Decimal('0.25'), 'anzahl': 6}]
+
+    # 1.25 / 10 = 0.125 -> ROUND(0.125, 2) = 0.13
+    assert ScatterGatherExecutor.combine(rows, ('quotient', 'summe', 'anzahl', 2)) \
+        == Decimal('0.13')